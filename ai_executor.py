@@ -0,0 +1,127 @@
+from typing import Optional, Tuple, Callable, Awaitable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+import threading
+
+from minimax_agent import SearchCancelled
+from metrics import record_search
+from profiler import SamplingProfiler
+
+# Threads running AI searches, and how many searches may run or wait at once
+AI_THREADS = int(os.getenv("AI_THREADS", "2"))
+AI_MAX_PENDING = int(os.getenv("AI_MAX_PENDING", "16"))
+# Opt-in: sample the stack of searches and keep profiles of those slower than
+# AI_PROFILE_SLOW_MS (0 disables) in AI_PROFILE_DIR
+AI_PROFILE_SLOW_MS = float(os.getenv("AI_PROFILE_SLOW_MS", "0"))
+AI_PROFILE_DIR = os.getenv("AI_PROFILE_DIR", "profiles")
+
+# How often a waiting request checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.1
+
+
+class AIQueueFull(Exception):
+    """Raised when too many AI searches are already running or queued"""
+
+
+class AIExecutor:
+    """Runs agent searches off the event loop on a bounded thread pool.
+
+    Searches run on a copy of the board, so a cancelled or abandoned search
+    never leaves the game's board half-modified.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = AI_THREADS,
+        max_pending: int = AI_MAX_PENDING,
+        profiler: Optional[SamplingProfiler] = None,
+    ):
+        self.max_pending = max_pending
+        self.profiler = profiler
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-search")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def get_best_move(
+        self,
+        agent,
+        board,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        on_progress: Optional[Callable[[Tuple[int, int], int], None]] = None,
+    ) -> Optional[Tuple[int, int]]:
+        """Search for the agent's move without blocking the event loop.
+
+        Raises AIQueueFull when saturated and SearchCancelled when
+        is_disconnected reports that the client has gone away. on_progress
+        is called on the event loop with (move, depth) as the search deepens.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise AIQueueFull()
+            self._pending += 1
+
+        report = None
+        if on_progress is not None:
+            loop = asyncio.get_running_loop()
+            report = functools.partial(loop.call_soon_threadsafe, on_progress)
+
+        future = self.executor.submit(_run_search, agent, board.copy(), report, self.profiler)
+        # The slot is only freed once the search has really stopped
+        future.add_done_callback(self._release)
+        wrapped = asyncio.wrap_future(future)
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({wrapped}, timeout=DISCONNECT_POLL_SECONDS)
+                if done:
+                    return wrapped.result()
+                if is_disconnected is not None and await is_disconnected():
+                    self._cancel(agent, future, wrapped)
+                    raise SearchCancelled()
+        except asyncio.CancelledError:
+            self._cancel(agent, future, wrapped)
+            raise
+
+    def _cancel(self, agent, future, wrapped) -> None:
+        if not future.cancel() and not future.done():
+            agent.cancel()
+        # Nobody awaits the abandoned search, so consume its outcome here
+        wrapped.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_search(
+    agent,
+    board,
+    report: Optional[Callable[[Tuple[int, int], int], None]],
+    profiler: Optional[SamplingProfiler],
+) -> Optional[Tuple[int, int]]:
+    agent.on_progress = report
+    try:
+        if profiler is None:
+            move = agent.get_best_move(board)
+        else:
+            with profiler.profile(type(agent).__name__):
+                move = agent.get_best_move(board)
+    finally:
+        agent.on_progress = None
+    record_search(agent)
+    return move
+
+
+# Global instance
+ai_executor = AIExecutor(
+    profiler=SamplingProfiler(AI_PROFILE_SLOW_MS / 1000, AI_PROFILE_DIR) if AI_PROFILE_SLOW_MS > 0 else None
+)
@@ -0,0 +1,103 @@
+from typing import Optional, Dict, Tuple
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from jose import JWTError, jwt
+
+from game_cache import GameCache
+
+# Supabase signs access tokens with the project's JWT secret (Settings -> API)
+JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+JWT_ALGORITHMS = os.getenv("JWT_ALGORITHMS", "HS256").split(",")
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+
+# Verified tokens kept in memory, and the longest a token without exp is trusted
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_MAX_SECONDS = float(os.getenv("AUTH_CACHE_MAX_SECONDS", "300"))
+
+# At most this many log records per message and level per interval
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "5"))
+LOG_RATE_INTERVAL_SECONDS = float(os.getenv("LOG_RATE_INTERVAL_SECONDS", "60"))
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops repeats of a message (by format string and level) past a per-interval limit"""
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, interval_seconds: float = LOG_RATE_INTERVAL_SECONDS):
+        super().__init__()
+        self.limit = limit
+        self.interval_seconds = interval_seconds
+        # (level, msg) -> [window start, records in window]
+        self._windows: Dict[Tuple[int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval_seconds:
+                self._windows[key] = [now, 1]
+                return True
+            window[1] += 1
+            return window[1] <= self.limit
+
+
+logger = logging.getLogger("auth")
+logger.addFilter(RateLimitFilter())
+
+
+class AuthError(Exception):
+    """Raised when a bearer token is missing, malformed, expired or not correctly signed"""
+
+
+class User:
+    def __init__(self, id: str, email: Optional[str] = None):
+        self.id = id
+        self.email = email
+
+
+# sha256(token) -> (user, unix time the cached verification expires)
+_verified: GameCache[Tuple[User, float]] = GameCache(AUTH_CACHE_SIZE, ttl_seconds=None)
+
+
+def verify_token(token: str) -> User:
+    """Return the token's user, checking signature, audience and exp once per token"""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    now = time.time()
+    cached = _verified.get(key)
+    if cached is not None:
+        user, expires_at = cached
+        if now < expires_at:
+            return user
+        _verified.pop(key)
+
+    if not JWT_SECRET:
+        logger.error("SUPABASE_JWT_SECRET is not set; rejecting all tokens")
+        raise AuthError("Authentication is not configured")
+
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=JWT_ALGORITHMS, audience=JWT_AUDIENCE)
+    except JWTError as e:
+        logger.info("Rejected token: %s", e)
+        raise AuthError("Invalid or expired token")
+
+    user_id = claims.get("sub")
+    if not user_id:
+        logger.info("Rejected token without a subject")
+        raise AuthError("No user ID in token")
+
+    user = User(id=user_id, email=claims.get("email"))
+    expires_at = now + AUTH_CACHE_MAX_SECONDS
+    if "exp" in claims:
+        expires_at = min(expires_at, float(claims["exp"]))
+    _verified.put(key, (user, expires_at))
+    logger.debug("Authenticated user %s", user_id)
+    return user
+
+
+def auth_cache_stats() -> Dict[str, int]:
+    return _verified.stats()
@@ -0,0 +1,196 @@
+from typing import List, Dict, Any, Callable, Optional
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from game_engine import MetaBoard
+from bitboard_engine import BitMetaBoard
+from minimax_agent import MinimaxAgent
+
+# Plies played before each phase's positions are sampled
+PHASES = {
+    "opening": (2, 6),
+    "midgame": (18, 30),
+    "endgame": (40, 55),
+}
+POSITIONS_PER_PHASE = 4
+CORPUS_SEED = 1234
+# Timed searches per position; the median is reported, since one shallow search takes ~0.1 ms
+SEARCH_REPEATS = 7
+
+
+def random_position(rng: random.Random, plies: int) -> Optional[MetaBoard]:
+    board = MetaBoard()
+    player = 1
+    for _ in range(plies):
+        if board.game_winner is not None:
+            return None
+        board_idx = rng.choice(board.get_available_boards())
+        board.make_move(board_idx, rng.choice(board.get_available_moves(board_idx)), player)
+        player = 3 - player
+    return board if board.game_winner is None else None
+
+
+def build_corpus(seed: int = CORPUS_SEED) -> Dict[str, List[MetaBoard]]:
+    """Fixed set of positions per game phase, identical for a given seed"""
+    rng = random.Random(seed)
+    corpus: Dict[str, List[MetaBoard]] = {}
+    for phase, (low, high) in PHASES.items():
+        positions: List[MetaBoard] = []
+        while len(positions) < POSITIONS_PER_PHASE:
+            board = random_position(rng, rng.randint(low, high))
+            if board is not None:
+                positions.append(board)
+        corpus[phase] = positions
+    return corpus
+
+
+def rate(fn: Callable[[], int], min_seconds: float) -> float:
+    """Operations per second of fn, which returns how many operations it did"""
+    ops = 0
+    started = time.perf_counter()
+    while True:
+        ops += fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return ops / elapsed
+
+
+def bench_make_unmake(boards: List[Any]) -> Callable[[], int]:
+    def run() -> int:
+        ops = 0
+        for board in boards:
+            player = 1 if len(board.move_history) % 2 == 0 else 2
+            for board_idx in board.get_available_boards():
+                for position in board.get_available_moves(board_idx):
+                    board.make_move(board_idx, position, player)
+                    board.unmake_move()
+                    ops += 1
+        return ops
+    return run
+
+
+def bench_each(fn: Callable[[Any], Any], boards: List[Any]) -> Callable[[], int]:
+    def run() -> int:
+        for board in boards:
+            fn(board)
+        return len(boards)
+    return run
+
+
+def bench_engine(corpus: Dict[str, List[MetaBoard]], min_seconds: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    agent = MinimaxAgent(2, 1)
+    for phase, boards in corpus.items():
+        bit_boards = [BitMetaBoard.from_metaboard(b) for b in boards]
+        results[phase] = {
+            "make_unmake_per_sec": rate(bench_make_unmake(boards), min_seconds),
+            "bitboard_make_unmake_per_sec": rate(bench_make_unmake(bit_boards), min_seconds),
+            "get_state_per_sec": rate(bench_each(MetaBoard.get_state, boards), min_seconds),
+            "copy_per_sec": rate(bench_each(MetaBoard.copy, boards), min_seconds),
+            "evaluate_per_sec": rate(bench_each(agent._evaluate_position, boards), min_seconds),
+        }
+    return results
+
+
+def to_move(board: MetaBoard) -> int:
+    return 1 if len(board.move_history) % 2 == 0 else 2
+
+
+def bench_search(
+    corpus: Dict[str, List[MetaBoard]], depths: List[int], repeats: int = SEARCH_REPEATS
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for phase, boards in corpus.items():
+        results[phase] = {}
+        for depth in depths:
+            total_time = 0.0
+            total_nodes = 0
+            for board in boards:
+                times: List[float] = []
+                for _ in range(repeats):
+                    # Fresh agent per search so transposition tables do not carry over
+                    agent = MinimaxAgent(to_move(board), depth)
+                    started = time.perf_counter()
+                    agent.get_best_move(board)
+                    times.append(time.perf_counter() - started)
+                total_time += statistics.median(times)
+                total_nodes += agent.nodes_evaluated
+
+            # Memory is measured in a separate pass since tracing slows the search;
+            # agents are built first so their table allocation is not counted
+            agents = [MinimaxAgent(to_move(board), depth) for board in boards]
+            tracemalloc.start()
+            for agent, board in zip(agents, boards):
+                agent.get_best_move(board)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[phase][f"depth_{depth}"] = {
+                "ms_per_move": total_time * 1000 / len(boards),
+                "nodes_per_move": total_nodes / len(boards),
+                "nodes_per_sec": total_nodes / total_time if total_time else 0.0,
+                "peak_memory_kb": peak / 1024,
+            }
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List metrics that got worse than baseline by more than tolerance (a fraction)"""
+    regressions: List[str] = []
+
+    def walk(cur: Any, base: Any, path: str) -> None:
+        if isinstance(cur, dict) and isinstance(base, dict):
+            for key in cur:
+                if key in base:
+                    walk(cur[key], base[key], f"{path}.{key}" if path else key)
+            return
+        if not isinstance(cur, (int, float)) or not isinstance(base, (int, float)) or not base:
+            return
+        # Throughput metrics should not drop; cost metrics should not rise
+        higher_is_better = path.endswith("_per_sec")
+        change = (cur - base) / base
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{path}: {base:.1f} -> {cur:.1f} ({change:+.0%})")
+
+    walk(current, baseline, "")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game engine and AI search")
+    parser.add_argument("--depths", default="1,2,3,4", help="comma-separated search depths")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="time per engine micro-benchmark")
+    parser.add_argument("--repeats", type=int, default=SEARCH_REPEATS, help="timed searches per position (median kept)")
+    parser.add_argument("--seed", type=int, default=CORPUS_SEED)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.seed)
+    report = {
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "engine": bench_engine(corpus, args.min_seconds),
+        "search": bench_search(corpus, [int(d) for d in args.depths.split(",")], args.repeats),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
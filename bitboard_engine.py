@@ -0,0 +1,253 @@
+from typing import List, Tuple, Optional, Dict
+
+from game_engine import (
+    GameState,
+    MiniboardState,
+    MetaBoard,
+    MiniBoard,
+    ZOBRIST_CELLS,
+    ZOBRIST_NEXT_BOARD,
+)
+
+
+# Cell i of a 3x3 board maps to bit i of a 9-bit mask
+WIN_MASKS: Tuple[int, ...] = (
+    0b000000111,
+    0b000111000,
+    0b111000000,
+    0b001001001,
+    0b010010010,
+    0b100100100,
+    0b100010001,
+    0b001010100,
+)
+FULL_MASK = 0x1FF
+
+# IS_WIN[mask] is True when the mask contains a complete line
+IS_WIN: Tuple[bool, ...] = tuple(
+    any(mask & win == win for win in WIN_MASKS) for mask in range(512)
+)
+
+# FREE_CELLS[occupied] lists the empty positions of a mini-board
+FREE_CELLS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(i for i in range(9) if not (occupied >> i) & 1) for occupied in range(512)
+)
+
+DRAW = 3
+
+
+class BitMetaBoard:
+    """Compact Ultimate Tic-Tac-Toe engine backed by 9-bit masks.
+
+    Mirrors the MetaBoard rules and public surface, but each mini-board is
+    stored as one mask per player and the meta board as one mask per
+    outcome (player 1, player 2, draw).
+    """
+
+    __slots__ = (
+        "masks",
+        "meta_masks",
+        "game_winner",
+        "next_board",
+        "move_history",
+        "undo_stack",
+        "hash",
+    )
+
+    def __init__(self):
+        # masks[player - 1][board_index] -> cells taken by player
+        self.masks: Tuple[List[int], List[int]] = ([0] * 9, [0] * 9)
+        # meta_masks[0/1/2] -> boards won by player 1, player 2, drawn
+        self.meta_masks: List[int] = [0, 0, 0]
+        self.game_winner: Optional[int] = None
+        self.next_board: Optional[int] = None
+        self.move_history: List[Dict[str, int]] = []
+        self.undo_stack: List[Optional[int]] = []
+        # Same Zobrist scheme as MetaBoard, so hashes agree across engines
+        self.hash: int = 0
+
+    @property
+    def closed_mask(self) -> int:
+        return self.meta_masks[0] | self.meta_masks[1] | self.meta_masks[2]
+
+    def board_winner(self, board_index: int) -> Optional[int]:
+        bit = 1 << board_index
+        for outcome in range(3):
+            if self.meta_masks[outcome] & bit:
+                return outcome + 1
+        return None
+
+    def make_move(self, board_index: int, position: int, player: int) -> Tuple[bool, str]:
+        if self.game_winner is not None:
+            return False, "Game is already over"
+
+        if self.next_board is not None and board_index != self.next_board:
+            return False, f"Must play in board {self.next_board}"
+
+        board_bit = 1 << board_index
+        if self.closed_mask & board_bit:
+            return False, "This board is already won"
+
+        own = self.masks[player - 1]
+        cell = 1 << position
+        if (own[board_index] | self.masks[2 - player][board_index]) & cell:
+            return False, "Invalid move on this board"
+
+        own[board_index] |= cell
+
+        if IS_WIN[own[board_index]]:
+            self._close_board(board_bit, player - 1)
+        elif (self.masks[0][board_index] | self.masks[1][board_index]) == FULL_MASK:
+            self._close_board(board_bit, DRAW - 1)
+
+        self.undo_stack.append(self.next_board)
+        previous_next_board = self.next_board
+        self.next_board = position
+        if self.closed_mask & cell:
+            self.next_board = None
+
+        self.hash ^= (
+            ZOBRIST_CELLS[player - 1][board_index * 9 + position]
+            ^ ZOBRIST_NEXT_BOARD[previous_next_board]
+            ^ ZOBRIST_NEXT_BOARD[self.next_board]
+        )
+
+        self.move_history.append({
+            "board": board_index,
+            "position": position,
+            "player": player,
+        })
+
+        return True, "Move successful"
+
+    def unmake_move(self) -> bool:
+        """Undo the last move applied with make_move on this instance"""
+        if not self.undo_stack:
+            return False
+
+        last = self.move_history.pop()
+        board_index = last["board"]
+        open_bit = ~(1 << board_index)
+
+        self.masks[last["player"] - 1][board_index] &= ~(1 << last["position"])
+        for outcome in range(3):
+            self.meta_masks[outcome] &= open_bit
+        self.game_winner = None
+
+        previous_next_board = self.undo_stack.pop()
+        self.hash ^= (
+            ZOBRIST_CELLS[last["player"] - 1][board_index * 9 + last["position"]]
+            ^ ZOBRIST_NEXT_BOARD[self.next_board]
+            ^ ZOBRIST_NEXT_BOARD[previous_next_board]
+        )
+        self.next_board = previous_next_board
+        return True
+
+    def compute_hash(self) -> int:
+        """Recompute the Zobrist hash from scratch, e.g. after loading a game"""
+        h = ZOBRIST_NEXT_BOARD[self.next_board]
+        for player in (1, 2):
+            for i, mask in enumerate(self.masks[player - 1]):
+                for position in range(9):
+                    if (mask >> position) & 1:
+                        h ^= ZOBRIST_CELLS[player - 1][i * 9 + position]
+        self.hash = h
+        return h
+
+    def _close_board(self, board_bit: int, outcome: int) -> None:
+        self.meta_masks[outcome] |= board_bit
+        # A line of drawn boards also ends the game as a draw, as in MetaBoard
+        if IS_WIN[self.meta_masks[outcome]]:
+            self.game_winner = outcome + 1
+        elif self.closed_mask == FULL_MASK:
+            self.game_winner = DRAW
+
+    def get_available_boards(self) -> List[int]:
+        closed = self.closed_mask
+        if self.next_board is not None and not (closed >> self.next_board) & 1:
+            return [self.next_board]
+        return list(FREE_CELLS[closed])
+
+    def get_available_moves(self, board_index: int) -> List[int]:
+        if (self.closed_mask >> board_index) & 1:
+            return []
+        return list(FREE_CELLS[self.masks[0][board_index] | self.masks[1][board_index]])
+
+    def get_board(self, board_index: int) -> List[int]:
+        x_mask = self.masks[0][board_index]
+        o_mask = self.masks[1][board_index]
+        return [
+            1 if (x_mask >> i) & 1 else 2 if (o_mask >> i) & 1 else 0
+            for i in range(9)
+        ]
+
+    def get_meta_board(self) -> List[int]:
+        return [self.board_winner(i) or 0 for i in range(9)]
+
+    def get_state(self) -> GameState:
+        boards = []
+        for i in range(9):
+            board = self.get_board(i)
+            boards.append(MiniboardState(
+                board=board,
+                winner=self.board_winner(i),
+                available_moves=[p for p, val in enumerate(board) if val == 0],
+            ))
+        return GameState(
+            boards=boards,
+            meta_board=self.get_meta_board(),
+            game_winner=self.game_winner,
+            next_board=self.next_board,
+            available_boards=self.get_available_boards(),
+            move_history=self.move_history.copy(),
+        )
+
+    def copy(self) -> 'BitMetaBoard':
+        copy = BitMetaBoard.__new__(BitMetaBoard)
+        copy.masks = (self.masks[0].copy(), self.masks[1].copy())
+        copy.meta_masks = self.meta_masks.copy()
+        copy.game_winner = self.game_winner
+        copy.next_board = self.next_board
+        copy.move_history = self.move_history.copy()
+        copy.undo_stack = self.undo_stack.copy()
+        copy.hash = self.hash
+        return copy
+
+    def reset(self) -> None:
+        self.masks = ([0] * 9, [0] * 9)
+        self.meta_masks = [0, 0, 0]
+        self.game_winner = None
+        self.next_board = None
+        self.move_history = []
+        self.undo_stack = []
+        self.hash = 0
+
+    @classmethod
+    def from_metaboard(cls, meta: MetaBoard) -> 'BitMetaBoard':
+        bit_board = cls()
+        for i, mini in enumerate(meta.boards):
+            for position, val in enumerate(mini.board):
+                if val in (1, 2):
+                    bit_board.masks[val - 1][i] |= 1 << position
+            if meta.meta_board[i] in (1, 2, DRAW):
+                bit_board.meta_masks[meta.meta_board[i] - 1] |= 1 << i
+        bit_board.game_winner = meta.game_winner
+        bit_board.next_board = meta.next_board
+        bit_board.move_history = list(meta.move_history)
+        bit_board.compute_hash()
+        return bit_board
+
+    def to_metaboard(self) -> MetaBoard:
+        meta = MetaBoard()
+        for i in range(9):
+            mini = MiniBoard()
+            mini.board = self.get_board(i)
+            mini.winner = self.board_winner(i)
+            meta.boards[i] = mini
+        meta.meta_board = self.get_meta_board()
+        meta.game_winner = self.game_winner
+        meta.next_board = self.next_board
+        meta.move_history = list(self.move_history)
+        meta.hash = self.hash
+        meta.compute_codes()
+        return meta
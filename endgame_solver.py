@@ -0,0 +1,154 @@
+from typing import Optional, Tuple, Dict, Callable, List
+import os
+import struct
+import threading
+
+from game_engine import ZOBRIST_SIDE
+from move_ordering import completes_line
+
+# File layout: magic, entry count, then (uint64 key, int8 result) records.
+# Files with the older magic were keyed without the side to move and are ignored.
+CACHE_MAGIC = b"UTE2"
+STALE_CACHE_MAGICS = (b"UTTE",)
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<Qb")
+
+WIN, DRAW, LOSS = 1, 0, -1
+
+# How many nodes pass between calls to the caller's stop check
+CHECK_EVERY = 1024
+
+
+def empty_cells(game_state) -> int:
+    """Open cells left in undecided mini-boards"""
+    return sum(
+        len(game_state.boards[i].get_available_moves())
+        for i in range(9)
+        if game_state.meta_board[i] == 0
+    )
+
+
+class EndgameSolver:
+    """Exact win/draw/loss solver for positions with few open cells.
+
+    Results are memoized by Zobrist hash plus side to move, from the point
+    of view of the player to move, shared by every game using the solver, and can be
+    saved to and reloaded from a cache file so solved endgames survive
+    restarts.
+    """
+
+    def __init__(self, max_cells: int = 12, path: Optional[str] = None, max_entries: int = 2_000_000):
+        self.max_cells = max_cells
+        self.path = path
+        self.max_entries = max_entries
+        self._results: Optional[Dict[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[int, int]:
+        with self._lock:
+            if self._results is None:
+                results: Dict[int, int] = {}
+                if self.path and os.path.exists(self.path):
+                    with open(self.path, "rb") as f:
+                        data = f.read()
+                    magic, count = HEADER.unpack_from(data, 0)
+                    if magic in STALE_CACHE_MAGICS:
+                        count = 0
+                    elif magic != CACHE_MAGIC:
+                        raise ValueError(f"{self.path} is not an endgame cache")
+                    for key, result in RECORD.iter_unpack(data[HEADER.size:HEADER.size + count * RECORD.size]):
+                        results[key] = result
+                self._results = results
+            return self._results
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def applies(self, game_state) -> bool:
+        return empty_cells(game_state) <= self.max_cells
+
+    def solve(
+        self,
+        game_state,
+        player: int,
+        check: Optional[Callable[[], None]] = None,
+    ) -> Tuple[Optional[Tuple[int, int]], int, int]:
+        """Best move for player, its exact result (WIN, DRAW or LOSS) and nodes searched.
+
+        check is called every CHECK_EVERY nodes and may raise to abort the
+        solve; the board is restored before the exception propagates.
+        """
+        results = self._load()
+        # Per call, since several threads may share one solver
+        nodes = [0]
+        root_ply = len(game_state.move_history)
+        best_move: Optional[Tuple[int, int]] = None
+        best = LOSS - 1
+        try:
+            for move in self._ordered_moves(game_state, player):
+                game_state.make_move(move[0], move[1], player)
+                value = -self._negamax(game_state, 3 - player, results, check, nodes)
+                game_state.unmake_move()
+                if value > best:
+                    best, best_move = value, move
+                    if best == WIN:
+                        break
+        finally:
+            while len(game_state.move_history) > root_ply:
+                game_state.unmake_move()
+        return best_move, best, nodes[0]
+
+    def _negamax(self, game_state, mover: int, results: Dict[int, int], check, nodes: List[int]) -> int:
+        winner = game_state.game_winner
+        if winner is not None:
+            if winner == mover:
+                return WIN
+            return DRAW if winner == 3 else LOSS
+
+        key = game_state.hash ^ ZOBRIST_SIDE[mover - 1]
+        known = results.get(key)
+        if known is not None:
+            return known
+
+        nodes[0] += 1
+        if check is not None and nodes[0] % CHECK_EVERY == 0:
+            check()
+
+        best = LOSS
+        for board_idx, position in self._ordered_moves(game_state, mover):
+            game_state.make_move(board_idx, position, mover)
+            value = -self._negamax(game_state, 3 - mover, results, check, nodes)
+            game_state.unmake_move()
+            if value > best:
+                best = value
+                if best == WIN:
+                    break
+
+        if len(results) < self.max_entries:
+            results[key] = best
+        return best
+
+    def _ordered_moves(self, game_state, mover: int) -> List[Tuple[int, int]]:
+        """Legal moves, mini-board wins first so proofs of a win end early"""
+        wins: List[Tuple[int, int]] = []
+        rest: List[Tuple[int, int]] = []
+        for board_idx in game_state.get_available_boards():
+            cells = game_state.boards[board_idx].board
+            for position in game_state.get_available_moves(board_idx):
+                if completes_line(cells, position, mover):
+                    wins.append((board_idx, position))
+                else:
+                    rest.append((board_idx, position))
+        return wins + rest
+
+    def save(self) -> None:
+        """Write every solved position to the cache file, if one is configured"""
+        if not self.path or self._results is None:
+            return
+        results = dict(self._results)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(CACHE_MAGIC, len(results)))
+            for key in sorted(results):
+                f.write(RECORD.pack(key, results[key]))
+        os.replace(tmp_path, self.path)
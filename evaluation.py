@@ -0,0 +1,120 @@
+from typing import List, Tuple, Sequence
+
+from game_engine import POW3
+
+try:
+    import numpy as np
+except ImportError:  # Batch evaluation is optional
+    np = None
+
+LINES: Tuple[Tuple[int, int, int], ...] = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+)
+
+# Row code used for mini-boards that are already decided and no longer scored
+CLOSED = 3 ** 9
+META_WEIGHT = 3
+
+
+def _count_threats(cells: Sequence[int], player: int) -> int:
+    threats = 0
+    for line in LINES:
+        player_count = sum(1 for i in line if cells[i] == player)
+        empty_count = sum(1 for i in line if cells[i] == 0)
+
+        if player_count == 2 and empty_count == 1:
+            threats += 10
+        elif player_count == 1 and empty_count == 2:
+            threats += 1
+    return threats
+
+
+def _build_tables() -> Tuple[List[int], List[int]]:
+    p1: List[int] = []
+    p2: List[int] = []
+    for code in range(CLOSED):
+        cells = [(code // POW3[i]) % 3 for i in range(9)]
+        p1.append(_count_threats(cells, 1))
+        p2.append(_count_threats(cells, 2))
+    p1.append(0)
+    p2.append(0)
+    return p1, p2
+
+
+# THREATS[player - 1][code] -> threat score of that base-3 board for player
+THREATS: Tuple[List[int], List[int]] = _build_tables()
+
+# BASE3[mask] -> base-3 code with a 1 in every set bit, for converting bitboards
+BASE3: Tuple[int, ...] = tuple(
+    sum(POW3[i] for i in range(9) if (mask >> i) & 1) for mask in range(512)
+)
+
+
+def encode(game_state) -> List[int]:
+    """Row of 9 board codes (CLOSED for decided boards) plus the two meta codes"""
+    if hasattr(game_state, "board_codes"):
+        row = [
+            code if game_state.meta_board[i] == 0 else CLOSED
+            for i, code in enumerate(game_state.board_codes)
+        ]
+        return row + game_state.meta_codes
+
+    # BitMetaBoard: build codes from its masks
+    closed = game_state.closed_mask
+    x_masks, o_masks = game_state.masks
+    row = [
+        CLOSED if (closed >> i) & 1 else BASE3[x_masks[i]] + 2 * BASE3[o_masks[i]]
+        for i in range(9)
+    ]
+    x_meta, o_meta, draws = game_state.meta_masks
+    row.append(BASE3[x_meta] + 2 * BASE3[o_meta | draws])
+    row.append(BASE3[x_meta | draws] + 2 * BASE3[o_meta])
+    return row
+
+
+def evaluate(game_state, player: int) -> int:
+    """Heuristic score for player: open mini-board threats plus 3x meta-board threats"""
+    own = THREATS[player - 1]
+    other = THREATS[2 - player]
+    if hasattr(game_state, "board_codes"):
+        meta_board = game_state.meta_board
+        score = 0
+        for i, code in enumerate(game_state.board_codes):
+            if meta_board[i] == 0:
+                score += own[code] - other[code]
+        meta_codes = game_state.meta_codes
+    else:
+        row = encode(game_state)
+        score = sum(own[code] - other[code] for code in row[:9])
+        meta_codes = row[9:]
+
+    # Each player's meta threats are read from the view where draws block them
+    score += (own[meta_codes[player - 1]] - other[meta_codes[2 - player]]) * META_WEIGHT
+    return score
+
+
+def evaluate_batch(rows, player: int):
+    """Score many encoded positions at once; rows is an (N, 11) array of encode() output"""
+    if np is None:
+        raise RuntimeError("numpy is required for batch evaluation")
+
+    own, other = _numpy_tables(player)
+    rows = np.asarray(rows, dtype=np.int64)
+    boards = rows[:, :9]
+    scores = (own[boards] - other[boards]).sum(axis=1)
+    scores += (own[rows[:, 9 + player - 1]] - other[rows[:, 9 + 2 - player]]) * META_WEIGHT
+    return scores
+
+
+_numpy_cache = {}
+
+
+def _numpy_tables(player: int):
+    if player not in _numpy_cache:
+        _numpy_cache[player] = (
+            np.array(THREATS[player - 1], dtype=np.int64),
+            np.array(THREATS[2 - player], dtype=np.int64),
+        )
+    return _numpy_cache[player]
@@ -0,0 +1,92 @@
+from typing import Optional, Callable, Dict, Any, Tuple, Generic, TypeVar
+from collections import OrderedDict
+import threading
+import time
+
+V = TypeVar("V")
+
+
+class GameCache(Generic[V]):
+    """LRU cache bounded by entry count and idle time.
+
+    Entries idle for longer than ttl_seconds are dropped on the next cache
+    operation. on_evict(key, value) runs for every entry removed by the
+    size or idle limits (not for explicit pop), so owners can flush state
+    before it is lost.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl_seconds: Optional[float] = 1800,
+        on_evict: Optional[Callable[[str, V], None]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Tuple[V, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[V]:
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries[key] = (entry[0], time.monotonic())
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            self._expire()
+            while len(self._entries) > self.max_size:
+                self._evict_oldest()
+
+    def pop(self, key: str) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else None
+
+    def values(self):
+        with self._lock:
+            return [value for value, _ in self._entries.values()]
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Entries are kept in access order, so expired ones are at the front
+        while self._entries:
+            _, last_access = next(iter(self._entries.values()))
+            if last_access > cutoff:
+                break
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        key, (value, _) = self._entries.popitem(last=False)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
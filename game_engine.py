@@ -1,6 +1,24 @@
 from typing import List, Tuple, Optional, Dict, Any
 from dataclasses import dataclass, field
 from copy import deepcopy
+import random
+
+
+# Zobrist keys: one per (player, board * 9 + position) and one per forced board
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_CELLS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_zobrist_rng.getrandbits(64) for _ in range(81)) for _ in range(2)
+)
+ZOBRIST_NEXT_BOARD: Dict[Optional[int], int] = {
+    i: _zobrist_rng.getrandbits(64) for i in range(9)
+}
+ZOBRIST_NEXT_BOARD[None] = 0
+# Side-to-move keys, mixed in by caches whose results depend on who moves next.
+# MetaBoard.hash leaves them out since the API does not enforce turn order.
+ZOBRIST_SIDE: Tuple[int, int] = (_zobrist_rng.getrandbits(64), _zobrist_rng.getrandbits(64))
+
+# Base-3 board codes: cell i contributes value * 3 ** i
+POW3: Tuple[int, ...] = tuple(3 ** i for i in range(9))
 
 
 @dataclass
@@ -20,6 +38,57 @@ class GameState:
     move_history: List[Dict[str, int]] = field(default_factory=list)
 
 
+class Position:
+    """Immutable, hashable snapshot of a MetaBoard.
+
+    cells packs the 81 cells board by board and meta the 9 mini-board
+    results as digit strings; two positions are equal when their cells and
+    next board match, however they were reached. version is the
+    MetaBoard.version the snapshot was taken at.
+    """
+
+    __slots__ = ("cells", "meta", "next_board", "game_winner", "ply", "version")
+
+    def __init__(
+        self,
+        cells: str,
+        meta: str,
+        next_board: Optional[int],
+        game_winner: Optional[int],
+        ply: int,
+        version: int,
+    ):
+        object.__setattr__(self, "cells", cells)
+        object.__setattr__(self, "meta", meta)
+        object.__setattr__(self, "next_board", next_board)
+        object.__setattr__(self, "game_winner", game_winner)
+        object.__setattr__(self, "ply", ply)
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Position is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return self.cells == other.cells and self.next_board == other.next_board
+
+    def __hash__(self) -> int:
+        return hash((self.cells, self.next_board))
+
+    def __copy__(self) -> 'Position':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'Position':
+        return self
+
+    def __repr__(self) -> str:
+        return f"Position(cells={self.cells!r}, next_board={self.next_board}, ply={self.ply})"
+
+
+_DIGITS = "0123"
+
+
 class MiniBoard:
     def __init__(self):
         self.board: List[int] = [0] * 9
@@ -32,6 +101,10 @@ class MiniBoard:
         self._check_winner()
         return True
 
+    def unmake_move(self, position: int) -> None:
+        self.board[position] = 0
+        self.winner = None
+
     def _check_winner(self) -> None:
         winning_combos = [
             [0, 1, 2],
@@ -74,8 +147,29 @@ class MetaBoard:
         self.game_winner: Optional[int] = None
         self.next_board: Optional[int] = None
         self.move_history: List[Dict[str, int]] = []
+        # next_board before each applied move, popped by unmake_move
+        self.undo_stack: List[Optional[int]] = []
+        # Zobrist hash of the cells and next_board, updated incrementally
+        self.hash: int = 0
+        # Base-3 code of each mini-board, and of the meta board as seen by
+        # player 1 / player 2 (a drawn board counts as the other player's)
+        self.board_codes: List[int] = [0] * 9
+        self.meta_codes: List[int] = [0, 0]
+        # Bumped by every change, so cached views know when they are stale
+        self.version = 0
+        # Bumped by reset, so a move history from before it is never mistaken for this one
+        self.epoch = 0
+        self._state: Optional[GameState] = None
+        self._state_version = 0
+        self._position: Optional[Position] = None
 
     def make_move(self, board_index: int, position: int, player: int) -> Tuple[bool, str]:
+        # Checked before anything changes; bad values would index the tables out of range
+        if player != 1 and player != 2:
+            return False, "Player must be 1 or 2"
+        if not (0 <= board_index < 9 and 0 <= position < 9):
+            return False, "Board and position must be between 0 and 8"
+
         if self.game_winner is not None:
             return False, "Game is already over"
 
@@ -88,22 +182,91 @@ class MetaBoard:
         if not self.boards[board_index].make_move(position, player):
             return False, "Invalid move on this board"
 
+        self.board_codes[board_index] += player * POW3[position]
+
         if self.boards[board_index].winner is not None:
             self.meta_board[board_index] = self.boards[board_index].winner
+            self._update_meta_codes(board_index, 1)
             self._check_game_winner()
 
+        self.undo_stack.append(self.next_board)
+        previous_next_board = self.next_board
         self.next_board = position
         if self.meta_board[position] != 0:
             self.next_board = None
 
+        self.hash ^= (
+            ZOBRIST_CELLS[player - 1][board_index * 9 + position]
+            ^ ZOBRIST_NEXT_BOARD[previous_next_board]
+            ^ ZOBRIST_NEXT_BOARD[self.next_board]
+        )
+
         self.move_history.append({
             "board": board_index,
             "position": position,
             "player": player,
         })
+        self.version += 1
 
         return True, "Move successful"
 
+    def unmake_move(self) -> bool:
+        """Undo the last move applied with make_move on this instance"""
+        if not self.undo_stack:
+            return False
+
+        last = self.move_history.pop()
+        board_index = last["board"]
+
+        # A board can only be played while open, so undoing always reopens it
+        self.boards[board_index].unmake_move(last["position"])
+        self.board_codes[board_index] -= last["player"] * POW3[last["position"]]
+        if self.meta_board[board_index] != 0:
+            self._update_meta_codes(board_index, -1)
+        self.meta_board[board_index] = 0
+        self.game_winner = None
+
+        previous_next_board = self.undo_stack.pop()
+        self.hash ^= (
+            ZOBRIST_CELLS[last["player"] - 1][board_index * 9 + last["position"]]
+            ^ ZOBRIST_NEXT_BOARD[self.next_board]
+            ^ ZOBRIST_NEXT_BOARD[previous_next_board]
+        )
+        self.next_board = previous_next_board
+        self.version += 1
+        return True
+
+    def _update_meta_codes(self, board_index: int, sign: int) -> None:
+        winner = self.meta_board[board_index]
+        weight = sign * POW3[board_index]
+        if winner == 3:
+            self.meta_codes[0] += 2 * weight
+            self.meta_codes[1] += weight
+        else:
+            self.meta_codes[0] += winner * weight
+            self.meta_codes[1] += winner * weight
+
+    def compute_codes(self) -> None:
+        """Recompute board_codes and meta_codes, e.g. after loading a game"""
+        self.board_codes = [
+            sum(val * POW3[i] for i, val in enumerate(board.board))
+            for board in self.boards
+        ]
+        self.meta_codes = [0, 0]
+        for i, winner in enumerate(self.meta_board):
+            if winner != 0:
+                self._update_meta_codes(i, 1)
+
+    def compute_hash(self) -> int:
+        """Recompute the Zobrist hash from scratch, e.g. after loading a game"""
+        h = ZOBRIST_NEXT_BOARD[self.next_board]
+        for i, board in enumerate(self.boards):
+            for position, val in enumerate(board.board):
+                if val in (1, 2):
+                    h ^= ZOBRIST_CELLS[val - 1][i * 9 + position]
+        self.hash = h
+        return h
+
     def _check_game_winner(self) -> None:
         winning_combos = [
             [0, 1, 2],
@@ -134,15 +297,67 @@ class MetaBoard:
                 return [i for i, val in enumerate(self.meta_board) if val == 0]
         return [i for i, val in enumerate(self.meta_board) if val == 0]
 
+    def get_available_moves(self, board_index: int) -> List[int]:
+        if self.meta_board[board_index] != 0:
+            return []
+        return self.boards[board_index].get_available_moves()
+
     def get_state(self) -> GameState:
-        return GameState(
-            boards=[board.get_state() for board in self.boards],
-            meta_board=self.meta_board.copy(),
-            game_winner=self.game_winner,
-            next_board=self.next_board,
-            available_boards=self.get_available_boards(),
-            move_history=self.move_history.copy(),
-        )
+        """Full state view, built once per version; callers must not modify it"""
+        # Read once: a state built while the board changes is stored under the old version
+        version = self.version
+        state = self._state
+        if state is None or self._state_version != version:
+            state = GameState(
+                boards=[board.get_state() for board in self.boards],
+                meta_board=self.meta_board.copy(),
+                game_winner=self.game_winner,
+                next_board=self.next_board,
+                available_boards=self.get_available_boards(),
+                move_history=self.move_history.copy(),
+            )
+            self._state = state
+            self._state_version = version
+        return state
+
+    def snapshot(self) -> Position:
+        """Immutable Position of the current board, built once per version"""
+        version = self.version
+        position = self._position
+        if position is None or position.version != version:
+            position = Position(
+                "".join(_DIGITS[cell] for board in self.boards for cell in board.board),
+                "".join(_DIGITS[value] for value in self.meta_board),
+                self.next_board,
+                self.game_winner,
+                len(self.move_history),
+                version,
+            )
+            self._position = position
+        return position
+
+    def copy(self) -> 'MetaBoard':
+        copy = MetaBoard.__new__(MetaBoard)
+        copy.boards = []
+        for board in self.boards:
+            new_board = MiniBoard()
+            new_board.board = board.board.copy()
+            new_board.winner = board.winner
+            copy.boards.append(new_board)
+        copy.meta_board = self.meta_board.copy()
+        copy.game_winner = self.game_winner
+        copy.next_board = self.next_board
+        copy.move_history = self.move_history.copy()
+        copy.undo_stack = self.undo_stack.copy()
+        copy.hash = self.hash
+        copy.board_codes = self.board_codes.copy()
+        copy.meta_codes = self.meta_codes.copy()
+        copy.version = self.version
+        copy.epoch = self.epoch
+        copy._state = None
+        # Positions are immutable, so the copy can share the cached one
+        copy._position = self._position
+        return copy
 
     def reset(self) -> None:
         self.boards = [MiniBoard() for _ in range(9)]
@@ -150,4 +365,10 @@ class MetaBoard:
         self.game_winner = None
         self.next_board = None
         self.move_history = []
+        self.undo_stack = []
+        self.hash = 0
+        self.board_codes = [0] * 9
+        self.meta_codes = [0, 0]
+        self.version += 1
+        self.epoch += 1
 
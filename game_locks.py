@@ -0,0 +1,32 @@
+from typing import Dict, List, Any
+from contextlib import asynccontextmanager
+import asyncio
+
+
+class GameLocks:
+    """One asyncio lock per game, so moves on a game run one at a time.
+
+    Locks exist only while some request holds or waits for them, so the
+    registry stays as small as the number of games being played right now.
+    """
+
+    def __init__(self):
+        # game_id -> [lock, number of holders and waiters]
+        self._locks: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, game_id: str):
+        entry = self._locks.get(game_id)
+        if entry is None:
+            entry = self._locks[game_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[game_id]
@@ -1,108 +1,302 @@
-from typing import Optional, Dict, Any
-from supabase import create_client, Client
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import time
 import os
 from dotenv import load_dotenv
 from game_engine import MetaBoard
 from minimax_agent import MinimaxAgent
+from transposition_table import TranspositionTable
+from mcts_agent import MCTSAgent
+from parallel_search import ParallelMinimaxAgent, ParallelSearchPool
+from opening_book import OpeningBook
+from endgame_solver import EndgameSolver
+from game_cache import GameCache
+from storage import GameStorage, AsyncStorageRunner, create_storage
 
 # Load environment variables
 load_dotenv('env')
 
+# AI search limits: deepen up to AI_MAX_DEPTH plies within AI_TIME_BUDGET_MS per move
+AI_MAX_DEPTH = int(os.getenv("AI_MAX_DEPTH", "8"))
+AI_TIME_BUDGET_MS = int(os.getenv("AI_TIME_BUDGET_MS", "1000"))
+# Worker processes for root-parallel minimax; 1 searches on the calling thread
+AI_WORKERS = int(os.getenv("AI_WORKERS", "1"))
+# One transposition table of 2**AI_TT_SIZE_BITS slots shared by every cached game's minimax agent
+AI_TT_SIZE_BITS = int(os.getenv("AI_TT_SIZE_BITS", "18"))
+# Opening book built by opening_book.py; missing files are treated as empty
+AI_OPENING_BOOK = os.getenv("AI_OPENING_BOOK", "opening_book.bin")
+# Solve exactly once at most AI_ENDGAME_CELLS cells are open (0 disables); solved
+# positions are saved to AI_ENDGAME_CACHE on shutdown and reloaded on start
+AI_ENDGAME_CELLS = int(os.getenv("AI_ENDGAME_CELLS", "14"))
+AI_ENDGAME_CACHE = os.getenv("AI_ENDGAME_CACHE", "endgame_cache.bin")
+
+# In-memory game cache: at most GAME_CACHE_SIZE games, dropped after GAME_CACHE_TTL_SECONDS idle
+GAME_CACHE_SIZE = int(os.getenv("GAME_CACHE_SIZE", "1000"))
+GAME_CACHE_TTL_SECONDS = float(os.getenv("GAME_CACHE_TTL_SECONDS", "1800"))
+
+# Write-behind: coalesce moves in memory and save at most every GAME_FLUSH_INTERVAL_SECONDS.
+# A crash loses at most that interval of moves; finished games are saved immediately.
+GAME_WRITE_BEHIND = os.getenv("GAME_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+GAME_FLUSH_INTERVAL_SECONDS = float(os.getenv("GAME_FLUSH_INTERVAL_SECONDS", "2"))
+
+# Storage layout: "snapshot" rewrites the whole game_state per save; "move_log" appends
+# each move to game_moves and rewrites game_state only every GAME_SNAPSHOT_EVERY plies
+GAME_STORAGE_MODE = os.getenv("GAME_STORAGE_MODE", "snapshot")
+GAME_SNAPSHOT_EVERY = int(os.getenv("GAME_SNAPSHOT_EVERY", "20"))
+
+# Opponents a game can be created with
+AI_AGENT_TYPES = ("minimax", "mcts")
+
+logger = logging.getLogger("game_store")
+
 
 class GameData:
-    def __init__(self, board: MetaBoard, ai_agent: MinimaxAgent):
+    def __init__(self, board: MetaBoard, ai_agent, agent_type: str = "minimax", user_id: Optional[str] = None):
         self.board = board
         self.ai_agent = ai_agent
+        self.agent_type = agent_type
+        # Owner, kept with the board so ownership checks need no database read
+        self.user_id = user_id
+        # True while the board has changes that are not yet in storage
+        self.dirty = False
+        self.dirty_since: Optional[float] = None
+        # Move-log mode: plies already in game_moves, and ply of the last game_state
+        # snapshot (None when the stored game_state is not a move-log snapshot yet)
+        self.persisted_ply = 0
+        self.snapshot_ply: Optional[int] = 0
+        # Set by GameStore.reset_game until the old moves are deleted from game_moves
+        self.reset_pending = False
 
 
 class GameStore:
-    def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
-        if not supabase_url or not supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in env file")
-        
-        print(f"Initializing game store with Supabase URL: {supabase_url[:30]}...")
-        self.supabase: Client = create_client(supabase_url, supabase_key)
-        self.games: Dict[str, GameData] = {}
+    def __init__(self, storage: Optional[GameStorage] = None):
+        # Backend chosen by GAME_STORAGE_BACKEND unless one is passed in
+        self.storage = storage if storage is not None else create_storage()
+        # Runs storage calls for the async *_async methods off the event loop
+        self.runner = AsyncStorageRunner()
+        self.games: GameCache[GameData] = GameCache(
+            GAME_CACHE_SIZE, GAME_CACHE_TTL_SECONDS, on_evict=self._on_evict
+        )
+        self.search_pool: Optional[ParallelSearchPool] = (
+            ParallelSearchPool(AI_WORKERS) if AI_WORKERS > 1 else None
+        )
+        self.opening_book = OpeningBook(AI_OPENING_BOOK)
+        # Entries are keyed by Zobrist hash and side to move and scored for player 2, so games can share them
+        self.transposition_table = TranspositionTable(AI_TT_SIZE_BITS)
+        self.endgame_solver: Optional[EndgameSolver] = (
+            EndgameSolver(AI_ENDGAME_CELLS, AI_ENDGAME_CACHE) if AI_ENDGAME_CELLS > 0 else None
+        )
+        self.write_behind = GAME_WRITE_BEHIND
+        self.move_log = GAME_STORAGE_MODE == "move_log"
+        # Games with changes waiting for the next flush
+        self.dirty_games: Dict[str, GameData] = {}
+        self.writes = 0
+
+    def _new_agent(self, agent_type: str = "minimax"):
+        if agent_type == "mcts":
+            return MCTSAgent(
+                2, time_budget_ms=AI_TIME_BUDGET_MS, opening_book=self.opening_book
+            )
+        if self.search_pool is not None:
+            return ParallelMinimaxAgent(
+                2,
+                AI_MAX_DEPTH,
+                pool=self.search_pool,
+                time_budget_ms=AI_TIME_BUDGET_MS,
+                opening_book=self.opening_book,
+                endgame_solver=self.endgame_solver,
+                transposition_table=self.transposition_table,
+            )
+        return MinimaxAgent(
+            2,
+            AI_MAX_DEPTH,
+            time_budget_ms=AI_TIME_BUDGET_MS,
+            opening_book=self.opening_book,
+            endgame_solver=self.endgame_solver,
+            transposition_table=self.transposition_table,
+        )
+
+    def _on_evict(self, game_id: str, game_data: GameData) -> None:
+        """Hand unsaved changes to the flusher instead of saving under the cache lock"""
+        if game_data.dirty:
+            self.dirty_games[game_id] = game_data
+        else:
+            self.dirty_games.pop(game_id, None)
+
+    def _cached(self, game_id: str) -> Optional[GameData]:
+        """Cached game, including one evicted while its changes wait for the flusher"""
+        cached = self.games.get(game_id)
+        if cached is None:
+            cached = self.dirty_games.get(game_id)
+            if cached is not None:
+                self.games.put(game_id, cached)
+        return cached
+
+    def due_dirty_games(self, max_age_seconds: float = 0) -> List[Tuple[str, GameData]]:
+        """Dirty games that have waited at least max_age_seconds"""
+        now = time.monotonic()
+        return [
+            (game_id, game_data)
+            for game_id, game_data in list(self.dirty_games.items())
+            if game_data.dirty_since is None or now - game_data.dirty_since >= max_age_seconds
+        ]
+
+    def flush_dirty(self, max_age_seconds: float = 0) -> int:
+        """Save dirty games that have waited at least max_age_seconds; returns how many"""
+        flushed = 0
+        for game_id, game_data in self.due_dirty_games(max_age_seconds):
+            try:
+                self._save_game(game_id, game_data)
+                flushed += 1
+            except Exception as e:
+                # Stays dirty and is retried on the next flush
+                logger.warning("Failed to flush game %s: %s", game_id, e)
+        return flushed
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.games.stats()
 
-    def create_new_game(self, user_id: str) -> str:
-        """Create a new game in Supabase and return the game ID"""
+    def close(self) -> None:
+        """Save pending changes and release background resources"""
+        self.flush_dirty()
+        if self.search_pool is not None:
+            self.search_pool.shutdown()
+        if self.endgame_solver is not None:
+            try:
+                self.endgame_solver.save()
+            except OSError as e:
+                logger.error("Failed to save endgame cache: %s", e)
+        self.runner.shutdown()
+        self.storage.close()
+
+    def create_new_game(self, user_id: str, agent_type: str = "minimax") -> str:
+        """Create a new game in storage and return the game ID"""
         from uuid import uuid4
+
+        if agent_type not in AI_AGENT_TYPES:
+            raise ValueError(f"Unknown AI agent: {agent_type}")
         
         game_id = str(uuid4())
         new_board = MetaBoard()
         
-        # Get state and convert to dict
-        state = new_board.get_state()
-        game_state = {
-            "boards": [{"board": b.board, "winner": b.winner, "available_moves": b.available_moves} for b in state.boards],
-            "meta_board": state.meta_board,
-            "game_winner": state.game_winner,
-            "next_board": state.next_board,
-            "available_boards": state.available_boards,
-            "move_history": state.move_history,
-        }
+        game_state = self._game_state_dict(new_board, agent_type)
         
-        # Insert into Supabase
-        self.supabase.table("games").insert({
-            "id": game_id,
-            "user_id": user_id,
-            "game_state": game_state,
-        }).execute()
+        self.storage.insert_game(game_id, user_id, game_state)
         
         # Store in memory
-        self.games[game_id] = GameData(
+        self.games.put(game_id, GameData(
             board=new_board,
-            ai_agent=MinimaxAgent(2, 4)
-        )
+            ai_agent=self._new_agent(agent_type),
+            agent_type=agent_type,
+            user_id=user_id,
+        ))
         
         return game_id
 
     def get_game(self, game_id: str) -> Optional[GameData]:
-        """Get game from cache or Supabase"""
+        """Get game from cache or storage"""
         # Check cache first
-        if game_id in self.games:
-            return self.games[game_id]
-        
-        # Load from Supabase
-        result = self.supabase.table("games").select("*").eq("id", game_id).execute()
+        cached = self._cached(game_id)
+        if cached is not None:
+            return cached
+        return self._load_game(game_id)
+
+    def _load_game(self, game_id: str) -> Optional[GameData]:
+        data = self.storage.load_game(game_id)
         
-        if not result.data:
+        if data is None:
             return None
         
-        data = result.data[0]
         state = data["game_state"]
         
-        # Reconstruct the board
-        board = MetaBoard()
-        
-        # Reconstruct boards
-        for i, b_state in enumerate(state["boards"]):
-            board.boards[i].board = b_state["board"]
-            board.boards[i].winner = b_state["winner"]
-        
-        board.meta_board = state["meta_board"]
-        board.game_winner = state["game_winner"]
-        board.next_board = state["next_board"]
-        board.move_history = state["move_history"]
+        if "ply" in state:
+            # Move-log game: replay its moves
+            moves = self.storage.load_moves(game_id)
+            board = MetaBoard()
+            for move in moves:
+                success, message = board.make_move(move["board"], move["position"], move["player"])
+                if not success:
+                    raise ValueError(f"Stored move {move['ply']} of game {game_id} is invalid: {message}")
+            persisted_ply = len(moves)
+        else:
+            # Reconstruct the board
+            board = MetaBoard()
+            
+            # Reconstruct boards
+            for i, b_state in enumerate(state["boards"]):
+                board.boards[i].board = b_state["board"]
+                board.boards[i].winner = b_state["winner"]
+            
+            board.meta_board = state["meta_board"]
+            board.game_winner = state["game_winner"]
+            board.next_board = state["next_board"]
+            board.move_history = state["move_history"]
+            board.compute_hash()
+            board.compute_codes()
+            # None of these moves are in game_moves yet
+            persisted_ply = 0
         
+        board.epoch = state.get("epoch", 0)
+        agent_type = state.get("ai_agent", "minimax")
         game_data = GameData(
             board=board,
-            ai_agent=MinimaxAgent(2, 4)
+            ai_agent=self._new_agent(agent_type),
+            agent_type=agent_type,
+            user_id=data["user_id"],
         )
+        game_data.persisted_ply = persisted_ply
+        game_data.snapshot_ply = state.get("ply")
         
         # Cache it
-        self.games[game_id] = game_data
+        self.games.put(game_id, game_data)
         
         return game_data
 
+    def reset_game(self, game_data: GameData) -> None:
+        """Clear the board; the next save also drops the game's stored moves"""
+        game_data.board.reset()
+        game_data.reset_pending = True
+
     def update_game(self, game_id: str, game_data: GameData) -> None:
-        """Update game in Supabase"""
-        self.games[game_id] = game_data
-        
-        state = game_data.board.get_state()
+        """Update game in storage"""
+        if not game_data.dirty:
+            game_data.dirty = True
+            game_data.dirty_since = time.monotonic()
+        self.games.put(game_id, game_data)
+
+        # Finished games are saved right away so results are never lost
+        if self.write_behind and game_data.board.game_winner is None:
+            self.dirty_games[game_id] = game_data
+            return
+        self._save_game(game_id, game_data)
+
+    async def create_new_game_async(self, user_id: str, agent_type: str = "minimax") -> str:
+        return await self.runner.run(self.create_new_game, user_id, agent_type)
+
+    async def get_game_async(self, game_id: str) -> Optional[GameData]:
+        """get_game for async handlers; only cache misses leave the event loop"""
+        cached = self._cached(game_id)
+        if cached is not None:
+            return cached
+        return await self.runner.run(self._load_game, game_id)
+
+    async def update_game_async(self, game_id: str, game_data: GameData) -> None:
+        if self.write_behind and game_data.board.game_winner is None:
+            # Only marks the game dirty; no storage call to wait for
+            self.update_game(game_id, game_data)
+            return
+        await self.runner.run(self.update_game, game_id, game_data, idempotent=False)
+
+    async def delete_game_async(self, game_id: str) -> None:
+        await self.runner.run(self.delete_game, game_id)
+
+    async def flush_game_async(self, game_id: str, game_data: GameData) -> None:
+        """Save one dirty game; callers hold the game's lock so the board cannot change meanwhile"""
+        if game_data.dirty:
+            await self.runner.run(self._save_game, game_id, game_data, idempotent=False)
+
+    def _game_state_dict(self, board: MetaBoard, agent_type: str) -> Dict[str, Any]:
+        state = board.get_state()
         
         # Convert dataclass to dict for JSON serialization
         game_state = {
@@ -111,18 +305,83 @@ class GameStore:
             "game_winner": state.game_winner,
             "next_board": state.next_board,
             "available_boards": state.available_boards,
-            "move_history": state.move_history,
+            "ai_agent": agent_type,
+            "epoch": board.epoch,
         }
-        
-        self.supabase.table("games").update({
-            "game_state": game_state,
-        }).eq("id", game_id).execute()
+        if self.move_log:
+            # History lives in game_moves; the snapshot only records how far it covers
+            game_state["ply"] = len(state.move_history)
+        else:
+            game_state["move_history"] = state.move_history
+        return game_state
+
+    def _save_game(self, game_id: str, game_data: GameData) -> None:
+        # A move made while saving bumps the version and keeps the game dirty
+        version = game_data.board.version
+        if self.move_log:
+            self._append_moves(game_id, game_data)
+        else:
+            self.storage.update_game_state(
+                game_id, self._game_state_dict(game_data.board, game_data.agent_type)
+            )
+            self.writes += 1
+        if game_data.board.version != version:
+            return
+        game_data.dirty = False
+        game_data.dirty_since = None
+        self.dirty_games.pop(game_id, None)
+
+    def _append_moves(self, game_id: str, game_data: GameData) -> None:
+        """Insert moves made since the last save, snapshotting game_state periodically"""
+        history = game_data.board.move_history
+        force_snapshot = game_data.snapshot_ply is None
+
+        if game_data.reset_pending or len(history) < game_data.persisted_ply:
+            # Reset or undone: drop the discarded moves, all of them after a reset.
+            # Cleared first so a reset made while deleting is not forgotten.
+            was_reset = game_data.reset_pending
+            keep = 0 if was_reset else len(history)
+            game_data.reset_pending = False
+            try:
+                self.storage.delete_moves_from(game_id, keep)
+            except Exception:
+                game_data.reset_pending = game_data.reset_pending or was_reset
+                raise
+            self.writes += 1
+            game_data.persisted_ply = keep
+            force_snapshot = True
+
+        # Moves made while this save runs are left for the next one, so the
+        # counters below only advance by what was actually written
+        new_moves = history[game_data.persisted_ply:]
+        if new_moves:
+            self.storage.append_moves(game_id, [
+                {
+                    "ply": game_data.persisted_ply + i,
+                    "board": move["board"],
+                    "position": move["position"],
+                    "player": move["player"],
+                }
+                for i, move in enumerate(new_moves)
+            ])
+            self.writes += 1
+            game_data.persisted_ply += len(new_moves)
+
+        if (
+            force_snapshot
+            or game_data.persisted_ply - (game_data.snapshot_ply or 0) >= GAME_SNAPSHOT_EVERY
+            or game_data.board.game_winner is not None
+        ):
+            game_state = self._game_state_dict(game_data.board, game_data.agent_type)
+            self.storage.update_game_state(game_id, game_state)
+            self.writes += 1
+            game_data.snapshot_ply = game_state["ply"]
 
     def delete_game(self, game_id: str) -> None:
-        """Delete game from Supabase and cache"""
-        self.supabase.table("games").delete().eq("id", game_id).execute()
-        if game_id in self.games:
-            del self.games[game_id]
+        """Delete game from storage and cache"""
+        self.storage.delete_game(game_id)
+        self.games.pop(game_id)
+        self.dirty_games.pop(game_id, None)
 
 
 # Global instance
@@ -1,23 +1,76 @@
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from typing import Optional, Tuple, Dict, Any
 import os
-from supabase import create_client, Client
-from jose import JWTError, jwt
-import base64
 import json
+import logging
+import asyncio
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv('env')
 
-from game_store import game_store
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
+from game_store import game_store, AI_AGENT_TYPES, GAME_FLUSH_INTERVAL_SECONDS
+from ai_executor import ai_executor, AIQueueFull
+from minimax_agent import SearchCancelled
 from game_engine import MetaBoard, GameState
+from game_locks import GameLocks
+from storage import StorageUnavailable
+from metrics import registry, CallbackMetric, REQUEST_LATENCY
+from auth import verify_token, AuthError, RateLimitFilter, auth_cache_stats
+from wire_format import STATE_FORMATS, serialize_state
 
 
 app = FastAPI(title="Ultimate Tic-Tac-Toe API")
 
+logger = logging.getLogger("api")
+logger.addFilter(RateLimitFilter())
+# Flush failures repeat every interval while storage is down
+for name in ("game_store", "storage"):
+    logging.getLogger(name).addFilter(RateLimitFilter())
+
+# Serializes requests that change the same game; other games run in parallel
+game_locks = GameLocks()
+
+for _name, _help, _type, _read in (
+    ("game_cache_hits_total", "Game cache hits", "counter", lambda: game_store.games.hits),
+    ("game_cache_misses_total", "Game cache misses", "counter", lambda: game_store.games.misses),
+    ("game_cache_evictions_total", "Games evicted from the cache", "counter", lambda: game_store.games.evictions),
+    ("game_cache_size", "Games in the cache", "gauge", lambda: len(game_store.games)),
+    ("game_dirty_games", "Games waiting for a write-behind flush", "gauge", lambda: len(game_store.dirty_games)),
+    ("storage_writes_total", "Storage writes issued by the game store", "counter", lambda: game_store.writes),
+    ("storage_retries_total", "Storage calls retried", "counter", lambda: game_store.runner.retried),
+    ("storage_failures_total", "Storage calls that failed after retries", "counter", lambda: game_store.runner.failed),
+    ("ai_pending_searches", "AI searches running or queued", "gauge", lambda: ai_executor.pending),
+    ("auth_cache_hits_total", "Requests authenticated from the token cache", "counter", lambda: auth_cache_stats()["hits"]),
+    ("auth_cache_misses_total", "Requests that verified a token signature", "counter", lambda: auth_cache_stats()["misses"]),
+):
+    registry.register(CallbackMetric(_name, _help, _type, _read))
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Per-endpoint latency histogram, labeled by route template"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, endpoint, str(status))
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -29,83 +82,61 @@ app.add_middleware(
 
 
 class MoveRequest(BaseModel):
-    board_index: int
-    position: int
-    player: int
+    board_index: int = Field(ge=0, le=8)
+    position: int = Field(ge=0, le=8)
+    player: int = Field(ge=1, le=2)
 
 
-def get_supabase_client() -> Client:
-    """Get Supabase client"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_KEY")
-    
-    if not supabase_url or not supabase_key:
-        raise HTTPException(status_code=500, detail="Supabase not configured")
-    
-    return create_client(supabase_url, supabase_key)
+def game_over_message(board: MetaBoard) -> str:
+    winner = {1: "You (X)", 2: "AI (O)"}.get(board.game_winner, "Draw")
+    return f"Game Over! Winner: {winner}"
+
+
+def player_to_move(board: MetaBoard) -> int:
+    """X (player 1, the human) moves on even plies, O (player 2, the AI) on odd ones"""
+    return 1 if len(board.move_history) % 2 == 0 else 2
+
+
+def check_turn(board: MetaBoard, player: int) -> None:
+    """409 when player is out of turn, e.g. a retried or double-clicked request"""
+    if player != player_to_move(board):
+        raise HTTPException(status_code=409, detail=f"Not player {player}'s turn")
+
 
+def state_format(
+    format: str = "full", since_ply: int = 0, epoch: Optional[int] = None
+) -> Tuple[str, int, Optional[int]]:
+    """Response state encoding: full, compact, or delta (moves after since_ply in epoch)"""
+    if format not in STATE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown state format: {format}")
+    return format, since_ply, epoch
 
-class User:
-    def __init__(self, id: str, email: Optional[str] = None):
-        self.id = id
-        self.email = email
 
 async def verify_user(authorization: Optional[str] = Header(None)):
-    """Verify user from authorization header by decoding JWT"""
+    """Verify the bearer token's signature and expiry; repeat tokens hit a cache"""
     if not authorization or not authorization.startswith("Bearer "):
-        print("No authorization header or doesn't start with Bearer")
         raise HTTPException(status_code=401, detail="Missing authorization header")
     
-    token = authorization.replace("Bearer ", "")
-    print(f"Received token: {token[:50]}...")
-    
     try:
-        # Decode JWT without verification for simplicity
-        # In production, you should verify the signature
-        parts = token.split('.')
-        if len(parts) < 2:
-            print("Invalid token format: not enough parts")
-            raise HTTPException(status_code=401, detail="Invalid token format")
-        
-        # Decode payload
-        payload = parts[1]
-        # Add padding if needed
-        payload += '=' * (4 - len(payload) % 4)
-        
-        try:
-            decoded = base64.urlsafe_b64decode(payload)
-            data = json.loads(decoded)
-            print(f"Decoded token data: {json.dumps(data, indent=2)}")
-        except Exception as decode_error:
-            print(f"Error decoding token: {decode_error}")
-            raise HTTPException(status_code=401, detail=f"Error decoding token: {str(decode_error)}")
-        
-        user_id = data.get('sub')
-        if not user_id:
-            print("No user ID in token")
-            raise HTTPException(status_code=401, detail="No user ID in token")
-        
-        print(f"Authenticated user: {user_id}")
-        return User(id=user_id, email=data.get('email'))
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Unexpected error in verify_user: {e}")
-        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        return verify_token(authorization[len("Bearer "):])
+    except AuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
 
 
 @app.post("/api/game/new")
-async def create_game(user=Depends(verify_user)):
-    """Create a new game"""
+async def create_game(agent: str = "minimax", user=Depends(verify_user)):
+    """Create a new game against the chosen AI agent (minimax or mcts)"""
     try:
-        print(f"Creating game for user: {user.id}")
-        game_id = game_store.create_new_game(user.id)
-        print(f"Game created with ID: {game_id}")
+        if agent not in AI_AGENT_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unknown AI agent: {agent}")
+
+        game_id = await game_store.create_new_game_async(user.id, agent)
+        logger.debug("Created game %s for user %s", game_id, user.id)
         
-        game_data = game_store.get_game(game_id)
+        game_data = await game_store.get_game_async(game_id)
         
         if not game_data:
-            print("Failed to retrieve game data")
+            logger.error("Game %s missing right after creation", game_id)
             raise HTTPException(status_code=500, detail="Failed to create game")
         
         state = game_data.board.get_state()
@@ -120,7 +151,6 @@ async def create_game(user=Depends(verify_user)):
             "move_history": state.move_history,
         }
         
-        print(f"Returning game state")
         return {
             "game_id": game_id,
             "state": state_dict,
@@ -128,10 +158,10 @@ async def create_game(user=Depends(verify_user)):
         }
     except HTTPException:
         raise
+    except StorageUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print(f"Error in create_game: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in create_game")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -139,150 +169,387 @@ async def create_game(user=Depends(verify_user)):
 async def make_move(
     game_id: str,
     move: MoveRequest,
-    user=Depends(verify_user)
+    user=Depends(verify_user),
+    fmt: Tuple[str, int, Optional[int]] = Depends(state_format),
 ):
     """Make a move"""
-    try:
-        game_data = game_store.get_game(game_id)
-        
-        if not game_data:
-            raise HTTPException(status_code=404, detail="Game not found")
-        
-        # Verify ownership (check in Supabase)
-        supabase_client = get_supabase_client()
-        result = supabase_client.table("games").select("user_id").eq("id", game_id).execute()
-        
-        if not result.data or result.data[0]["user_id"] != user.id:
-            raise HTTPException(status_code=403, detail="Unauthorized to access this game")
-        
-        success, message = game_data.board.make_move(
-            move.board_index,
-            move.position,
-            move.player
-        )
-        
-        if not success:
-            raise HTTPException(status_code=400, detail=message)
-        
-        game_over = game_data.board.game_winner is not None
-        
-        # Update in Supabase
-        game_store.update_game(game_id, game_data)
-        
-        return {
-            "game_id": game_id,
-            "state": game_data.board.get_state().__dict__,
-            "message": (
-                f"Game Over! Winner: "
-                + ("You (X)" if game_data.board.game_winner == 1 
-                   else "AI (O)" if game_data.board.game_winner == 2 
-                   else "Draw")
-                if game_over
-                else "Move successful. Waiting for AI..."
-            ),
-            "game_over": game_over,
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    async with game_locks.hold(game_id):
+        try:
+            game_data = await game_store.get_game_async(game_id)
+            
+            if not game_data:
+                raise HTTPException(status_code=404, detail="Game not found")
+            
+            # Verify ownership
+            if game_data.user_id != user.id:
+                raise HTTPException(status_code=403, detail="Unauthorized to access this game")
+            
+            check_turn(game_data.board, move.player)
+            success, message = game_data.board.make_move(
+                move.board_index,
+                move.position,
+                move.player
+            )
+            
+            if not success:
+                raise HTTPException(status_code=400, detail=message)
+            
+            game_over = game_data.board.game_winner is not None
+            
+            # Persist the move
+            await game_store.update_game_async(game_id, game_data)
+            
+            return {
+                "game_id": game_id,
+                "state": serialize_state(game_data.board, *fmt),
+                "message": game_over_message(game_data.board) if game_over else "Move successful. Waiting for AI...",
+                "game_over": game_over,
+            }
+        except HTTPException:
+            raise
+        except StorageUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/game/{game_id}/ai-move")
-async def ai_move(game_id: str, user=Depends(verify_user)):
+async def ai_move(
+    game_id: str,
+    request: Request,
+    user=Depends(verify_user),
+    fmt: Tuple[str, int, Optional[int]] = Depends(state_format),
+):
     """Get AI move"""
-    try:
-        game_data = game_store.get_game(game_id)
-        
-        if not game_data:
-            raise HTTPException(status_code=404, detail="Game not found")
-        
-        # Verify ownership
-        supabase_client = get_supabase_client()
-        result = supabase_client.table("games").select("user_id").eq("id", game_id).execute()
-        
-        if not result.data or result.data[0]["user_id"] != user.id:
-            raise HTTPException(status_code=403, detail="Unauthorized to access this game")
-        
-        if game_data.board.game_winner is not None:
+    async with game_locks.hold(game_id):
+        try:
+            game_data = await game_store.get_game_async(game_id)
+            
+            if not game_data:
+                raise HTTPException(status_code=404, detail="Game not found")
+            
+            # Verify ownership
+            if game_data.user_id != user.id:
+                raise HTTPException(status_code=403, detail="Unauthorized to access this game")
+            
+            if game_data.board.game_winner is not None:
+                return {
+                    "game_id": game_id,
+                    "board_index": -1,
+                    "position": -1,
+                    "state": serialize_state(game_data.board, *fmt),
+                    "message": "Game is already over",
+                    "game_over": True,
+                }
+            
+            check_turn(game_data.board, 2)
+            try:
+                move = await ai_executor.get_best_move(
+                    game_data.ai_agent,
+                    game_data.board,
+                    request.is_disconnected,
+                )
+            except AIQueueFull:
+                raise HTTPException(
+                    status_code=503,
+                    detail="AI is busy, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            except SearchCancelled:
+                # Client closed the request; nobody is waiting for this response
+                raise HTTPException(status_code=499, detail="Client disconnected")
+            
+            if not move:
+                raise HTTPException(status_code=400, detail="No valid moves available")
+            
+            board_index, position = move
+            success, message = game_data.board.make_move(board_index, position, 2)
+            
+            if not success:
+                raise HTTPException(status_code=400, detail=f"AI move failed: {message}")
+            
+            game_over = game_data.board.game_winner is not None
+            
+            # Persist the move
+            await game_store.update_game_async(game_id, game_data)
+            
             return {
                 "game_id": game_id,
-                "board_index": -1,
-                "position": -1,
-                "state": game_data.board.get_state().__dict__,
-                "message": "Game is already over",
-                "game_over": True,
+                "board_index": board_index,
+                "position": position,
+                "search_depth": game_data.ai_agent.depth_reached,
+                "state": serialize_state(game_data.board, *fmt),
+                "message": game_over_message(game_data.board) if game_over else "Your turn.",
+                "game_over": game_over,
             }
-        
-        move = game_data.ai_agent.get_best_move(game_data.board)
-        
-        if not move:
-            raise HTTPException(status_code=400, detail="No valid moves available")
-        
-        board_index, position = move
-        success, message = game_data.board.make_move(board_index, position, 2)
-        
+        except HTTPException:
+            raise
+        except StorageUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+async def finish_turn(
+    game_id: str,
+    game_data,
+    human_move: MoveRequest,
+    reply: Optional[Tuple[int, int]],
+    fmt: Tuple[str, int, Optional[int]],
+) -> Dict[str, Any]:
+    """Apply the AI reply (if any), save the game once and build the play response"""
+    board = game_data.board
+    if reply is not None:
+        success, message = board.make_move(reply[0], reply[1], 2)
         if not success:
+            board.unmake_move()
             raise HTTPException(status_code=400, detail=f"AI move failed: {message}")
-        
-        game_over = game_data.board.game_winner is not None
-        
-        # Update in Supabase
-        game_store.update_game(game_id, game_data)
-        
-        return {
-            "game_id": game_id,
-            "board_index": board_index,
-            "position": position,
-            "state": game_data.board.get_state().__dict__,
-            "message": (
-                f"Game Over! Winner: "
-                + ("You (X)" if game_data.board.game_winner == 1 
-                   else "AI (O)" if game_data.board.game_winner == 2 
-                   else "Draw")
-                if game_over
-                else "Your turn."
-            ),
-            "game_over": game_over,
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    
+    game_over = board.game_winner is not None
+    await game_store.update_game_async(game_id, game_data)
+    
+    return {
+        "game_id": game_id,
+        "move": {"board_index": human_move.board_index, "position": human_move.position},
+        "ai_move": (
+            {"board_index": reply[0], "position": reply[1]} if reply is not None else None
+        ),
+        "search_depth": game_data.ai_agent.depth_reached if reply is not None else 0,
+        "state": serialize_state(board, *fmt),
+        "message": game_over_message(board) if game_over else "Your turn.",
+        "game_over": game_over,
+    }
 
 
-@app.post("/api/game/{game_id}/reset")
-async def reset_game(game_id: str, user=Depends(verify_user)):
-    """Reset game"""
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def stream_turn(
+    game_id: str,
+    human_move: MoveRequest,
+    request: Request,
+    fmt: Tuple[str, int, Optional[int]],
+):
+    """Server-sent events: progress per finished search depth, then result or error"""
+    async with game_locks.hold(game_id):
+        game_data = await game_store.get_game_async(game_id)
+        if not game_data:
+            yield sse_event("error", {"status": 404, "detail": "Game not found"})
+            return
+            
+        try:
+            check_turn(game_data.board, 1)
+            check_turn(game_data.board, human_move.player)
+        except HTTPException as e:
+            yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+            return
+            
+        success, message = game_data.board.make_move(
+            human_move.board_index,
+            human_move.position,
+            human_move.player
+        )
+        if not success:
+            yield sse_event("error", {"status": 400, "detail": message})
+            return
+            
+        if game_data.board.game_winner is not None:
+            yield sse_event("result", await finish_turn(game_id, game_data, human_move, None, fmt))
+            return
+            
+        progress: asyncio.Queue = asyncio.Queue()
+        search = asyncio.ensure_future(ai_executor.get_best_move(
+            game_data.ai_agent,
+            game_data.board,
+            request.is_disconnected,
+            on_progress=lambda move, depth: progress.put_nowait((move, depth)),
+        ))
+        # Progress callbacks are queued before the search completes, so None comes last
+        search.add_done_callback(lambda _: progress.put_nowait(None))
+            
+        try:
+            while (item := await progress.get()) is not None:
+                (board_index, position), depth = item
+                yield sse_event("progress", {
+                    "board_index": board_index,
+                    "position": position,
+                    "depth": depth,
+                })
+            reply = search.result()
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away mid-stream
+            search.cancel()
+            game_data.board.unmake_move()
+            raise
+        except AIQueueFull:
+            game_data.board.unmake_move()
+            yield sse_event("error", {"status": 503, "detail": "AI is busy, please retry shortly"})
+            return
+        except SearchCancelled:
+            game_data.board.unmake_move()
+            return
+        except Exception as e:
+            game_data.board.unmake_move()
+            yield sse_event("error", {"status": 400, "detail": str(e)})
+            return
+            
+        try:
+            result = await finish_turn(game_id, game_data, human_move, reply, fmt)
+        except HTTPException as e:
+            yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+            return
+        except StorageUnavailable as e:
+            yield sse_event("error", {"status": 503, "detail": str(e)})
+            return
+        yield sse_event("result", result)
+
+
+@app.post("/api/game/{game_id}/play")
+async def play_turn(
+    game_id: str,
+    move: MoveRequest,
+    request: Request,
+    stream: bool = False,
+    user=Depends(verify_user),
+    fmt: Tuple[str, int, Optional[int]] = Depends(state_format),
+):
+    """Make a move and get the AI reply in one request, saving the game once"""
     try:
-        game_data = game_store.get_game(game_id)
+        game_data = await game_store.get_game_async(game_id)
         
         if not game_data:
             raise HTTPException(status_code=404, detail="Game not found")
         
         # Verify ownership
-        supabase_client = get_supabase_client()
-        result = supabase_client.table("games").select("user_id").eq("id", game_id).execute()
-        
-        if not result.data or result.data[0]["user_id"] != user.id:
+        if game_data.user_id != user.id:
             raise HTTPException(status_code=403, detail="Unauthorized to access this game")
         
-        game_data.board.reset()
-        
-        # Update in Supabase
-        game_store.update_game(game_id, game_data)
-        
-        return {
-            "game_id": game_id,
-            "state": game_data.board.get_state().__dict__,
-            "message": "Game reset. Make your move.",
-        }
+        if stream:
+            # The stream applies the move itself, holding the game lock while it runs
+            return StreamingResponse(
+                stream_turn(game_id, move, request, fmt),
+                media_type="text/event-stream",
+            )
+        
+        async with game_locks.hold(game_id):
+            # Fetched again under the lock in case the game was evicted meanwhile
+            game_data = await game_store.get_game_async(game_id)
+            
+            # The AI replies as player 2, so the human must move as player 1
+            check_turn(game_data.board, 1)
+            check_turn(game_data.board, move.player)
+            success, message = game_data.board.make_move(
+                move.board_index,
+                move.position,
+                move.player
+            )
+            
+            if not success:
+                raise HTTPException(status_code=400, detail=message)
+            
+            reply = None
+            if game_data.board.game_winner is None:
+                try:
+                    reply = await ai_executor.get_best_move(
+                        game_data.ai_agent,
+                        game_data.board,
+                        request.is_disconnected,
+                    )
+                except BaseException as e:
+                    # Undo the unsaved human move so the client can retry the whole turn
+                    game_data.board.unmake_move()
+                    if isinstance(e, AIQueueFull):
+                        raise HTTPException(
+                            status_code=503,
+                            detail="AI is busy, please retry shortly",
+                            headers={"Retry-After": "1"},
+                        )
+                    if isinstance(e, SearchCancelled):
+                        raise HTTPException(status_code=499, detail="Client disconnected")
+                    raise
+            
+            return await finish_turn(game_id, game_data, move, reply, fmt)
     except HTTPException:
         raise
+    except StorageUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/game/{game_id}/reset")
+async def reset_game(
+    game_id: str,
+    user=Depends(verify_user),
+    fmt: Tuple[str, int, Optional[int]] = Depends(state_format),
+):
+    """Reset game"""
+    async with game_locks.hold(game_id):
+        try:
+            game_data = await game_store.get_game_async(game_id)
+            
+            if not game_data:
+                raise HTTPException(status_code=404, detail="Game not found")
+            
+            # Verify ownership
+            if game_data.user_id != user.id:
+                raise HTTPException(status_code=403, detail="Unauthorized to access this game")
+            
+            game_store.reset_game(game_data)
+            
+            # Persist the move
+            await game_store.update_game_async(game_id, game_data)
+            
+            return {
+                "game_id": game_id,
+                "state": serialize_state(game_data.board, *fmt),
+                "message": "Game reset. Make your move.",
+            }
+        except HTTPException:
+            raise
+        except StorageUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+async def flush_games_periodically():
+    """Write back games changed in write-behind mode or evicted before they were saved"""
+    while True:
+        await asyncio.sleep(GAME_FLUSH_INTERVAL_SECONDS / 2)
+        for game_id, game_data in game_store.due_dirty_games(GAME_FLUSH_INTERVAL_SECONDS / 2):
+            try:
+                # Saved under the game's lock so no move lands mid-save
+                async with game_locks.hold(game_id):
+                    await game_store.flush_game_async(game_id, game_data)
+            except Exception as e:
+                logger.warning("Error flushing game %s: %s", game_id, e)
+
+
+@app.on_event("startup")
+async def startup():
+    """Start background tasks"""
+    # Also saves dirty games evicted from the cache, so it runs without write-behind too
+    app.state.flush_task = asyncio.create_task(flush_games_periodically())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release game store and AI search resources, saving pending games"""
+    flush_task = getattr(app.state, "flush_task", None)
+    if flush_task is not None:
+        flush_task.cancel()
+    ai_executor.shutdown()
+    game_store.close()
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/health")
 async def health():
     """Health check"""
@@ -0,0 +1,216 @@
+from typing import Optional, Tuple, List, Dict, Any
+import math
+import random
+import time
+
+from bitboard_engine import BitMetaBoard, IS_WIN, FREE_CELLS, FULL_MASK, DRAW
+from minimax_agent import SearchCancelled
+
+
+class MCTSNode:
+    __slots__ = ("move", "parent", "children", "untried_moves", "player", "visits", "score")
+
+    def __init__(
+        self,
+        move: Optional[Tuple[int, int]],
+        parent: Optional['MCTSNode'],
+        player: int,
+        untried_moves: List[Tuple[int, int]],
+    ):
+        self.move = move
+        self.parent = parent
+        self.children: List['MCTSNode'] = []
+        self.untried_moves = untried_moves
+        # Player who made self.move; rewards are from their point of view
+        self.player = player
+        self.visits = 0
+        self.score = 0.0
+
+    def select_child(self, exploration: float) -> 'MCTSNode':
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda c: c.score / c.visits + exploration * math.sqrt(log_visits / c.visits),
+        )
+
+
+def legal_moves(board: BitMetaBoard) -> List[Tuple[int, int]]:
+    return [
+        (board_idx, position)
+        for board_idx in board.get_available_boards()
+        for position in board.get_available_moves(board_idx)
+    ]
+
+
+def random_playout(
+    board: BitMetaBoard,
+    player: int,
+    rng: random.Random,
+) -> int:
+    """Play random moves on raw masks until the game ends and return the winner"""
+    if board.game_winner is not None:
+        return board.game_winner
+
+    masks = (board.masks[0].copy(), board.masks[1].copy())
+    meta = board.meta_masks.copy()
+    next_board = board.next_board
+
+    while True:
+        closed = meta[0] | meta[1] | meta[2]
+        if next_board is not None and not (closed >> next_board) & 1:
+            board_idx = next_board
+        else:
+            board_idx = rng.choice(FREE_CELLS[closed])
+
+        own = masks[player - 1]
+        free = FREE_CELLS[own[board_idx] | masks[2 - player][board_idx]]
+        position = rng.choice(free)
+        own[board_idx] |= 1 << position
+
+        outcome = -1
+        if IS_WIN[own[board_idx]]:
+            outcome = player - 1
+        elif len(free) == 1:
+            outcome = DRAW - 1
+        if outcome >= 0:
+            meta[outcome] |= 1 << board_idx
+            if IS_WIN[meta[outcome]]:
+                return outcome + 1
+            if (meta[0] | meta[1] | meta[2]) == FULL_MASK:
+                return DRAW
+
+        next_board = position
+        player = 3 - player
+
+
+class MCTSAgent:
+    """Monte Carlo Tree Search opponent with UCT selection.
+
+    Each search runs either a fixed number of iterations or until
+    time_budget_ms elapses, whichever is given (time wins if both are).
+    Playouts run on BitMetaBoard masks rather than MetaBoard objects.
+    """
+
+    def __init__(
+        self,
+        player: int = 2,
+        iterations: int = 2000,
+        time_budget_ms: Optional[int] = None,
+        exploration: float = math.sqrt(2),
+        seed: Optional[int] = None,
+        opening_book=None,
+    ):
+        self.player = player
+        self.opponent = 3 - player
+        self.iterations = iterations
+        self.time_budget_ms = time_budget_ms
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.search_time_ms = 0.0
+        # OpeningBook consulted before searching; None always searches
+        self.opening_book = opening_book
+        self.book_hit = False
+        self._cancelled = False
+
+    def get_best_move(self, game_state) -> Optional[Tuple[int, int]]:
+        # Reset before any early return so stats never describe a previous search
+        self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.search_time_ms = 0.0
+        self.book_hit = False
+        if self.opening_book is not None:
+            book_move = self.opening_book.lookup(game_state)
+            if book_move is not None:
+                self.book_hit = True
+                return book_move
+
+        if isinstance(game_state, BitMetaBoard):
+            root_board = game_state.copy()
+        else:
+            root_board = BitMetaBoard.from_metaboard(game_state)
+
+        self._cancelled = False
+        started = time.perf_counter()
+
+        root = MCTSNode(None, None, self.opponent, legal_moves(root_board))
+        if not root.untried_moves:
+            return None
+        if len(root.untried_moves) == 1:
+            return root.untried_moves[0]
+
+        deadline = (
+            started + self.time_budget_ms / 1000 if self.time_budget_ms is not None else None
+        )
+        try:
+            while True:
+                if self._cancelled:
+                    raise SearchCancelled()
+                # Always finish one iteration so there is a child to choose from
+                if self.nodes_evaluated > 0:
+                    if deadline is not None:
+                        if time.perf_counter() >= deadline:
+                            break
+                    elif self.nodes_evaluated >= self.iterations:
+                        break
+                self._run_iteration(root, root_board.copy())
+                self.nodes_evaluated += 1
+        finally:
+            self._cancelled = False
+            self.search_time_ms = (time.perf_counter() - started) * 1000
+
+        best = max(root.children, key=lambda c: c.visits)
+        return best.move
+
+    def _run_iteration(self, root: MCTSNode, board: BitMetaBoard) -> None:
+        node = root
+        depth = 0
+
+        # Selection
+        while not node.untried_moves and node.children:
+            node = node.select_child(self.exploration)
+            board.make_move(node.move[0], node.move[1], node.player)
+            depth += 1
+
+        # Expansion
+        if node.untried_moves:
+            move = node.untried_moves.pop(self.rng.randrange(len(node.untried_moves)))
+            player = 3 - node.player
+            board.make_move(move[0], move[1], player)
+            child = MCTSNode(
+                move,
+                node,
+                player,
+                legal_moves(board) if board.game_winner is None else [],
+            )
+            node.children.append(child)
+            node = child
+            depth += 1
+
+        self.depth_reached = max(self.depth_reached, depth)
+
+        # Simulation
+        winner = random_playout(board, 3 - node.player, self.rng)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.score += 1.0
+            elif winner == DRAW:
+                node.score += 0.5
+            node = node.parent
+
+    def cancel(self) -> None:
+        """Ask a running get_best_move (on another thread) to stop"""
+        self._cancelled = True
+
+    def get_search_stats(self) -> Dict[str, Any]:
+        """Counters from the last get_best_move call"""
+        return {
+            "nodes_evaluated": self.nodes_evaluated,
+            "depth_reached": self.depth_reached,
+            "search_time_ms": self.search_time_ms,
+            "book_hit": self.book_hit,
+        }
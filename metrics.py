@@ -0,0 +1,172 @@
+from typing import Callable, Dict, List, Sequence, Tuple
+import math
+import threading
+
+# Prometheus text exposition, kept dependency-free; served by /api/metrics
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEPTH_BUCKETS = tuple(float(d) for d in range(1, 21))
+RATE_BUCKETS = (1e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6)
+INF_BUCKET = 'le="+Inf"'
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, INF_BUCKET)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {series[-2]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-1])}")
+        return lines
+
+
+class CallbackMetric:
+    """Metric read from a callback at scrape time, for counts kept elsewhere"""
+
+    def __init__(self, name: str, help: str, type: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type}",
+            f"{self.name} {_format_value(self.read())}",
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A failing callback must not take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "API request latency", ("method", "endpoint", "status"),
+))
+AI_SEARCH_SECONDS = registry.register(Histogram(
+    "ai_search_duration_seconds", "Time per AI move search", ("agent",),
+))
+AI_SEARCH_DEPTH = registry.register(Histogram(
+    "ai_search_depth", "Depth reached per AI move search", ("agent",), DEPTH_BUCKETS,
+))
+AI_NODES_PER_SECOND = registry.register(Histogram(
+    "ai_search_nodes_per_second", "Search speed per AI move", ("agent",), RATE_BUCKETS,
+))
+AI_NODES = registry.register(Counter(
+    "ai_search_nodes_total", "Nodes searched by the AI", ("agent",),
+))
+AI_CUTOFFS = registry.register(Counter(
+    "ai_search_cutoffs_total", "Alpha-beta cutoffs", ("agent",),
+))
+AI_FIRST_MOVE_CUTOFFS = registry.register(Counter(
+    "ai_search_first_move_cutoffs_total", "Alpha-beta cutoffs on the first move tried", ("agent",),
+))
+AI_BOOK_HITS = registry.register(Counter(
+    "ai_opening_book_hits_total", "AI moves answered from the opening book", ("agent",),
+))
+STORAGE_LATENCY = registry.register(Histogram(
+    "storage_call_duration_seconds", "Storage call latency including retries", ("operation", "outcome"),
+))
+
+
+def record_search(agent) -> None:
+    """Record the stats of the search the agent just finished"""
+    stats = agent.get_search_stats()
+    name = type(agent).__name__
+    seconds = stats.get("search_time_ms", 0.0) / 1000
+    nodes = stats.get("nodes_evaluated", 0)
+    if stats.get("book_hit"):
+        AI_BOOK_HITS.inc(1, name)
+        return
+    AI_SEARCH_SECONDS.observe(seconds, name)
+    AI_SEARCH_DEPTH.observe(stats.get("depth_reached", 0), name)
+    if seconds > 0:
+        AI_NODES_PER_SECOND.observe(nodes / seconds, name)
+    AI_NODES.inc(nodes, name)
+    AI_CUTOFFS.inc(stats.get("cutoffs", 0), name)
+    AI_FIRST_MOVE_CUTOFFS.inc(stats.get("first_move_cutoffs", 0), name)
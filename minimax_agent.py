@@ -1,42 +1,210 @@
-from typing import Optional, Tuple
-from copy import deepcopy
+from typing import Optional, Tuple, List, Dict, Any, Callable
+import time
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from move_ordering import MoveOrderer
+from evaluation import evaluate
+from game_engine import ZOBRIST_SIDE
+from endgame_solver import empty_cells
+
+# Terminal scores start here, above anything evaluate() can return, so a
+# forced win or loss is never confused with a strong heuristic position
+WIN_SCORE = 1_000_000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out"""
+
+
+class SearchCancelled(Exception):
+    """Raised out of get_best_move when cancel() was called during the search"""
 
 
 class MinimaxAgent:
-    def __init__(self, player: int = 2, depth: int = 4):
+    def __init__(
+        self,
+        player: int = 2,
+        depth: int = 4,
+        use_transposition_table: bool = True,
+        tt_size_bits: int = 16,
+        time_budget_ms: Optional[int] = None,
+        use_move_ordering: bool = True,
+        move_orderer: Optional[MoveOrderer] = None,
+        opening_book=None,
+        endgame_solver=None,
+        transposition_table: Optional[TranspositionTable] = None,
+    ):
         self.player = player
         self.opponent = 3 - player  # 1 if player is 2, 2 if player is 1
+        # Fixed search depth, or the depth cap when searching under a time budget
         self.depth = depth
+        self.time_budget_ms = time_budget_ms
         self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.search_time_ms = 0.0
+        # Kept on the agent so entries carry over between moves of one game;
+        # pass a table to share it (and its memory) between agents instead
+        self.transposition_table: Optional[TranspositionTable] = (
+            (transposition_table or TranspositionTable(tt_size_bits)) if use_transposition_table else None
+        )
+        # Pass a MoveOrderer subclass to plug in a different ordering
+        self.move_orderer: Optional[MoveOrderer] = (
+            (move_orderer or MoveOrderer()) if use_move_ordering else None
+        )
+        # OpeningBook consulted before searching; None always searches
+        self.opening_book = opening_book
+        self.book_hit = False
+        # EndgameSolver used instead of the heuristic search once few cells are open
+        self.endgame_solver = endgame_solver
+        self.endgame_result: Optional[int] = None
+        # Called with (move, depth) each time iterative deepening finishes a depth
+        self.on_progress: Optional[Callable[[Tuple[int, int], int], None]] = None
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Counted per agent, since the table itself may be shared with other searches
+        self.tt_hits = 0
+        self._deadline: Optional[float] = None
+        self._cancelled = False
+        self._root_ply = 0
 
     def get_best_move(self, game_state) -> Optional[Tuple[int, int]]:
         self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_hits = 0
+        self._cancelled = False
+        self._root_ply = len(game_state.move_history)
+
+        self.book_hit = False
+        self.endgame_result = None
+        if self.opening_book is not None:
+            book_move = self.opening_book.lookup(game_state)
+            if book_move is not None:
+                self.book_hit = True
+                self.search_time_ms = 0.0
+                return book_move
+
+        hash_move: Optional[Tuple[int, int]] = None
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+            entry = self.transposition_table.probe(game_state.hash ^ ZOBRIST_SIDE[self.player - 1])
+            if entry is not None:
+                self.tt_hits += 1
+                hash_move = entry[4]
+
+        root_moves = self._legal_moves(game_state)
+        if not root_moves:
+            return None
+        if self.move_orderer is not None:
+            self.move_orderer.new_search()
+            root_moves = self.move_orderer.order(
+                game_state, root_moves, self.player, 0, hash_move
+            )
+
+        started = time.perf_counter()
+        try:
+            if self.endgame_solver is not None and self.endgame_solver.applies(game_state):
+                move = self._solve_endgame(game_state, started)
+                if move is not None:
+                    return move
+            if self.time_budget_ms is None:
+                best_move, _ = self._search_root(game_state, root_moves, self.depth)
+                self.depth_reached = self.depth
+                return best_move
+            return self._iterative_deepening(game_state, root_moves, started)
+        finally:
+            # Leave the board as it was if the search stopped early
+            while len(game_state.move_history) > self._root_ply:
+                game_state.unmake_move()
+            self._deadline = None
+            self._cancelled = False
+            self.search_time_ms = (time.perf_counter() - started) * 1000
+
+    def _iterative_deepening(
+        self,
+        game_state,
+        root_moves: List[Tuple[int, int]],
+        started: float,
+    ) -> Optional[Tuple[int, int]]:
+        """Deepen one ply at a time and keep the move of the deepest finished search"""
+        max_depth = min(self.depth, empty_cells(game_state))
+        deadline = started + self.time_budget_ms / 1000
+
+        best_move: Optional[Tuple[int, int]] = None
+        for depth in range(1, max_depth + 1):
+            # Depth 1 always completes so there is a move to return
+            if depth > 1:
+                self._deadline = deadline
+            try:
+                move, score = self._search_root(game_state, root_moves, depth)
+            except SearchTimeout:
+                break
+
+            best_move = move
+            self.depth_reached = depth
+            if self.on_progress is not None:
+                self.on_progress(move, depth)
+            # Search the previous iteration's best move first next time
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+
+            # A forced result will not change with more depth
+            if abs(score) >= WIN_SCORE or time.perf_counter() >= deadline:
+                break
+
+        return best_move
 
-        available_boards = game_state.get_available_boards()
+    def _search_root(
+        self,
+        game_state,
+        root_moves: List[Tuple[int, int]],
+        depth: int,
+    ) -> Tuple[Optional[Tuple[int, int]], float]:
         best_score = float('-inf')
         best_move: Optional[Tuple[int, int]] = None
 
-        for board_idx in available_boards:
-            board = game_state.boards[board_idx]
-            available_moves = board.get_available_moves()
+        for board_idx, position in root_moves:
+            game_state.make_move(board_idx, position, self.player)
 
-            for position in available_moves:
-                game_copy = self._copy_game(game_state)
-                game_copy.make_move(board_idx, position, self.player)
+            # Later root moves only need to prove they beat the best so far
+            score = self.minimax(
+                game_state, 
+                depth - 1, 
+                best_score, 
+                float('inf'), 
+                False
+            )
+            game_state.unmake_move()
 
-                score = self.minimax(
-                    game_copy, 
-                    self.depth - 1, 
-                    float('-inf'), 
-                    float('inf'), 
-                    False
-                )
+            if score > best_score:
+                best_score = score
+                best_move = (board_idx, position)
 
-                if score > best_score:
-                    best_score = score
-                    best_move = (board_idx, position)
+        return best_move, best_score
 
-        return best_move
+    def _solve_endgame(self, game_state, started: float) -> Optional[Tuple[int, int]]:
+        """Exact solve; under a time budget it gets half and then yields to the normal search"""
+        if self.time_budget_ms is not None:
+            self._deadline = started + self.time_budget_ms / 2000
+        try:
+            move, result, nodes = self.endgame_solver.solve(
+                game_state, self.player, self._check_limits
+            )
+        except SearchTimeout:
+            return None
+        finally:
+            self._deadline = None
+
+        self.nodes_evaluated += nodes
+        self.depth_reached = empty_cells(game_state)
+        self.endgame_result = result
+        return move
+
+    def _check_limits(self) -> None:
+        if self._cancelled:
+            raise SearchCancelled()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
 
     def minimax(
         self, 
@@ -48,106 +216,119 @@ class MinimaxAgent:
     ) -> float:
         self.nodes_evaluated += 1
 
+        if self.nodes_evaluated & 63 == 0:
+            if self._cancelled:
+                raise SearchCancelled()
+            if self._deadline is not None and time.perf_counter() > self._deadline:
+                raise SearchTimeout()
+
         if game_state.game_winner is not None:
             if game_state.game_winner == self.player:
-                return 10 + depth
+                return WIN_SCORE + depth
             elif game_state.game_winner == self.opponent:
-                return -10 - depth
+                return -WIN_SCORE - depth
             else:
                 return 0
 
         if depth == 0:
             return self._evaluate_position(game_state)
 
-        if is_maximizing:
-            max_eval = float('-inf')
-            available_boards = game_state.get_available_boards()
+        mover = self.player if is_maximizing else self.opponent
+        table = self.transposition_table
+        alpha_orig, beta_orig = alpha, beta
+        hash_move: Optional[Tuple[int, int]] = None
+        if table is not None:
+            # The same cells with the other side to move are a different position
+            key = game_state.hash ^ ZOBRIST_SIDE[mover - 1]
+            entry = table.probe(key)
+            if entry is not None:
+                self.tt_hits += 1
+                hash_move = entry[4]
+                if entry[1] >= depth:
+                    value, flag = entry[2], entry[3]
+                    if flag == EXACT:
+                        return value
+                    if flag == LOWER_BOUND:
+                        alpha = max(alpha, value)
+                    elif flag == UPPER_BOUND:
+                        beta = min(beta, value)
+                    if beta <= alpha:
+                        return value
 
-            for board_idx in available_boards:
-                board = game_state.boards[board_idx]
-                for position in board.get_available_moves():
-                    game_copy = self._copy_game(game_state)
-                    game_copy.make_move(board_idx, position, self.player)
+        moves = self._legal_moves(game_state)
+        ply = len(game_state.move_history) - self._root_ply
+        if self.move_orderer is not None:
+            moves = self.move_orderer.order(game_state, moves, mover, ply, hash_move)
 
-                    eval_score = self.minimax(game_copy, depth - 1, alpha, beta, False)
-                    max_eval = max(max_eval, eval_score)
-                    alpha = max(alpha, eval_score)
+        best_move: Optional[Tuple[int, int]] = None
+        best_eval = float('-inf') if is_maximizing else float('inf')
 
-                    if beta <= alpha:
-                        return max_eval
+        for index, move in enumerate(moves):
+            game_state.make_move(move[0], move[1], mover)
+            eval_score = self.minimax(game_state, depth - 1, alpha, beta, not is_maximizing)
+            game_state.unmake_move()
 
-            return max_eval if max_eval != float('-inf') else 0
-        else:
-            min_eval = float('inf')
-            available_boards = game_state.get_available_boards()
+            if is_maximizing:
+                if eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = move
+                alpha = max(alpha, eval_score)
+            else:
+                if eval_score < best_eval:
+                    best_eval = eval_score
+                    best_move = move
+                beta = min(beta, eval_score)
 
-            for board_idx in available_boards:
-                board = game_state.boards[board_idx]
-                for position in board.get_available_moves():
-                    game_copy = self._copy_game(game_state)
-                    game_copy.make_move(board_idx, position, self.opponent)
+            if beta <= alpha:
+                self.cutoffs += 1
+                if index == 0:
+                    self.first_move_cutoffs += 1
+                if self.move_orderer is not None:
+                    self.move_orderer.record_cutoff(move, mover, ply, depth)
+                break
 
-                    eval_score = self.minimax(game_copy, depth - 1, alpha, beta, True)
-                    min_eval = min(min_eval, eval_score)
-                    beta = min(beta, eval_score)
+        if best_move is None:
+            best_eval = 0
 
-                    if beta <= alpha:
-                        return min_eval
+        if table is not None:
+            if best_eval <= alpha_orig:
+                flag = UPPER_BOUND
+            elif best_eval >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            table.store(key, depth, best_eval, flag, best_move)
 
-            return min_eval if min_eval != float('inf') else 0
+        return best_eval
 
-    def _evaluate_position(self, game_state) -> float:
-        score = 0
-
-        score += self._count_threats(game_state.meta_board, self.player) * 3
-        score -= self._count_threats(game_state.meta_board, self.opponent) * 3
-
-        for i in range(len(game_state.boards)):
-            if game_state.meta_board[i] == 0:
-                board = game_state.boards[i]
-                score += self._count_threats(board.board, self.player)
-                score -= self._count_threats(board.board, self.opponent)
-
-        return score
-
-    def _count_threats(self, board: list, player: int) -> int:
-        threats = 0
-        winning_combos = [
-            [0, 1, 2],
-            [3, 4, 5],
-            [6, 7, 8],
-            [0, 3, 6],
-            [1, 4, 7],
-            [2, 5, 8],
-            [0, 4, 8],
-            [2, 4, 6],
+    def _legal_moves(self, game_state) -> List[Tuple[int, int]]:
+        return [
+            (board_idx, position)
+            for board_idx in game_state.get_available_boards()
+            for position in game_state.boards[board_idx].get_available_moves()
         ]
 
-        for combo in winning_combos:
-            player_count = sum(1 for i in combo if board[i] == player)
-            empty_count = sum(1 for i in combo if board[i] == 0)
-
-            if player_count == 2 and empty_count == 1:
-                threats += 10
-            elif player_count == 1 and empty_count == 2:
-                threats += 1
-
-        return threats
-
-    def _copy_game(self, game_state) -> 'MetaBoard':
-        """Deep copy the game state for AI calculations"""
-        from game_engine import MetaBoard, MiniBoard
-        
-        copy = MetaBoard()
-        copy.boards = []
-        for board in game_state.boards:
-            new_board = MiniBoard()
-            new_board.board = board.board.copy()
-            new_board.winner = board.winner
-            copy.boards.append(new_board)
-        copy.meta_board = game_state.meta_board.copy()
-        copy.game_winner = game_state.game_winner
-        copy.next_board = game_state.next_board
-        copy.move_history = deepcopy(game_state.move_history)
-        return copy
+    def cancel(self) -> None:
+        """Ask a running get_best_move (on another thread) to stop"""
+        self._cancelled = True
 
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def get_search_stats(self) -> Dict[str, Any]:
+        """Counters from the last get_best_move call"""
+        return {
+            "nodes_evaluated": self.nodes_evaluated,
+            "depth_reached": self.depth_reached,
+            "search_time_ms": self.search_time_ms,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate,
+            "tt_hits": self.tt_hits,
+            "book_hit": self.book_hit,
+            "endgame_result": self.endgame_result,
+        }
+
+    def _evaluate_position(self, game_state) -> float:
+        return evaluate(game_state, self.player)
@@ -0,0 +1,86 @@
+from typing import List, Optional, Tuple
+
+Move = Tuple[int, int]
+
+# For each cell, the pairs of other cells that complete a line through it
+LINES_THROUGH: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(
+    tuple(
+        tuple(c for c in combo if c != cell)
+        for combo in (
+            (0, 1, 2), (3, 4, 5), (6, 7, 8),
+            (0, 3, 6), (1, 4, 7), (2, 5, 8),
+            (0, 4, 8), (2, 4, 6),
+        )
+        if cell in combo
+    )
+    for cell in range(9)
+)
+
+HASH_MOVE_SCORE = 1 << 30
+WIN_SCORE = 1 << 28
+BLOCK_SCORE = 1 << 27
+KILLER_SCORE = 1 << 26
+
+
+def completes_line(board: List[int], position: int, player: int) -> bool:
+    for a, b in LINES_THROUGH[position]:
+        if board[a] == player and board[b] == player:
+            return True
+    return False
+
+
+class MoveOrderer:
+    """Sorts moves so alpha-beta sees the likely best ones first.
+
+    Order: the hash (or previous iteration's) move, moves that win a
+    mini-board, moves that block an opponent's mini-board win, the two
+    killer moves stored for the ply, then the rest by history score.
+    """
+
+    def __init__(self, max_ply: int = 82):
+        self.max_ply = max_ply
+        self.killers: List[List[Optional[Move]]] = [[None, None] for _ in range(max_ply)]
+        # history[player - 1][board * 9 + position]
+        self.history: List[List[int]] = [[0] * 81, [0] * 81]
+
+    def new_search(self) -> None:
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        # Keep some history between moves but let recent searches dominate
+        for table in self.history:
+            for i in range(81):
+                table[i] >>= 1
+
+    def order(
+        self,
+        game_state,
+        moves: List[Move],
+        player: int,
+        ply: int,
+        hash_move: Optional[Move] = None,
+    ) -> List[Move]:
+        opponent = 3 - player
+        killers = self.killers[ply] if ply < self.max_ply else (None, None)
+        history = self.history[player - 1]
+
+        def score(move: Move) -> int:
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            board_idx, position = move
+            board = game_state.boards[board_idx].board
+            if completes_line(board, position, player):
+                return WIN_SCORE
+            if completes_line(board, position, opponent):
+                return BLOCK_SCORE
+            if move == killers[0] or move == killers[1]:
+                return KILLER_SCORE
+            return history[board_idx * 9 + position]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def record_cutoff(self, move: Move, player: int, ply: int, depth: int) -> None:
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[player - 1][move[0] * 9 + move[1]] += depth * depth
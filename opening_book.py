@@ -0,0 +1,109 @@
+from typing import Optional, Tuple, Dict
+import argparse
+import os
+import struct
+import threading
+import time
+
+from game_engine import MetaBoard
+from minimax_agent import MinimaxAgent
+
+# File layout: magic, entry count, then (uint64 hash, uint8 board * 9 + position) records
+BOOK_MAGIC = b"UTTB"
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<QB")
+
+
+class OpeningBook:
+    """Precomputed best replies keyed by MetaBoard Zobrist hash.
+
+    The file is only read on the first lookup, so agents can hold a book
+    that is never used without paying for it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._moves: Optional[Dict[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[int, int]:
+        with self._lock:
+            if self._moves is None:
+                moves: Dict[int, int] = {}
+                if os.path.exists(self.path):
+                    with open(self.path, "rb") as f:
+                        data = f.read()
+                    magic, count = HEADER.unpack_from(data, 0)
+                    if magic != BOOK_MAGIC:
+                        raise ValueError(f"{self.path} is not an opening book")
+                    for key, move in RECORD.iter_unpack(data[HEADER.size:HEADER.size + count * RECORD.size]):
+                        moves[key] = move
+                self._moves = moves
+            return self._moves
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def lookup(self, game_state) -> Optional[Tuple[int, int]]:
+        """Return the book move for this position if it is known and legal"""
+        move = self._load().get(game_state.hash)
+        if move is None:
+            return None
+        board_idx, position = divmod(move, 9)
+        if (
+            board_idx in game_state.get_available_boards()
+            and position in game_state.get_available_moves(board_idx)
+        ):
+            return board_idx, position
+        return None
+
+
+def save_opening_book(path: str, moves: Dict[int, int]) -> None:
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, len(moves)))
+        for key in sorted(moves):
+            f.write(RECORD.pack(key, moves[key]))
+
+
+def generate_opening_book(max_ply: int, depth: int, player: int = 2) -> Dict[int, int]:
+    """Search every position up to max_ply plies where player is to move"""
+    board = MetaBoard()
+    agent = MinimaxAgent(player, depth)
+    moves: Dict[int, int] = {}
+    seen = set()
+
+    def visit(to_move: int) -> None:
+        ply = len(board.move_history)
+        if board.game_winner is not None or board.hash in seen:
+            return
+        seen.add(board.hash)
+
+        if to_move == player:
+            best = agent.get_best_move(board)
+            if best is not None:
+                moves[board.hash] = best[0] * 9 + best[1]
+
+        if ply >= max_ply:
+            return
+        for board_idx in board.get_available_boards():
+            for position in board.get_available_moves(board_idx):
+                board.make_move(board_idx, position, to_move)
+                visit(3 - to_move)
+                board.unmake_move()
+
+    visit(1)
+    return moves
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book for the AI")
+    parser.add_argument("--plies", type=int, default=1, help="deepest position (moves played) to include")
+    parser.add_argument("--depth", type=int, default=5, help="minimax depth used for each position")
+    parser.add_argument("--player", type=int, default=2, choices=(1, 2))
+    parser.add_argument("--output", default="opening_book.bin")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    book_moves = generate_opening_book(args.plies, args.depth, args.player)
+    save_opening_book(args.output, book_moves)
+    print(f"Wrote {len(book_moves)} positions to {args.output} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,170 @@
+from typing import Optional, Tuple, List, Dict
+from concurrent.futures import ProcessPoolExecutor, wait
+import multiprocessing
+import threading
+import time
+
+from minimax_agent import MinimaxAgent, SearchTimeout, SearchCancelled
+
+# Searches running at once that can share an alpha bound; extra ones search unshared
+MAX_SHARED_SEARCHES = 64
+
+# How often a waiting search checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.05
+
+# Root moves are searched with alpha just below the shared bound so moves that
+# tie the best score still get an exact value and the merge stays deterministic
+ALPHA_MARGIN = 1e-6
+
+_shared_alphas = None
+_worker_agents: Dict[Tuple[int, int], MinimaxAgent] = {}
+# (player, depth) -> (slot, root hash, root ply) of the search its agent last served
+_worker_roots: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+
+
+def _init_worker(shared_alphas) -> None:
+    global _shared_alphas
+    _shared_alphas = shared_alphas
+
+
+def _search_root_move(
+    board,
+    move: Tuple[int, int],
+    player: int,
+    depth: int,
+    slot: int,
+    deadline_wall: Optional[float],
+) -> Optional[Tuple[float, float, int, int, int, int]]:
+    """Search one root move in a worker process.
+
+    Returns (score, alpha_used, nodes, cutoffs, first_move_cutoffs, tt_hits), or None
+    when the deadline passed before the search finished.
+    """
+    # One agent per (player, depth) so its transposition table is reused
+    agent = _worker_agents.get((player, depth))
+    if agent is None:
+        agent = MinimaxAgent(player, depth)
+        _worker_agents[(player, depth)] = agent
+
+    # Age the table and reset killers once per root search, as get_best_move does
+    root = (slot, board.hash, len(board.move_history))
+    if _worker_roots.get((player, depth)) != root:
+        _worker_roots[(player, depth)] = root
+        agent.transposition_table.new_search()
+        agent.move_orderer.new_search()
+
+    agent.nodes_evaluated = 0
+    agent.cutoffs = 0
+    agent.first_move_cutoffs = 0
+    agent.tt_hits = 0
+    agent._root_ply = len(board.move_history)
+    if deadline_wall is not None:
+        agent._deadline = time.perf_counter() + (deadline_wall - time.time())
+
+    alpha = _shared_alphas[slot] - ALPHA_MARGIN if slot >= 0 else float('-inf')
+
+    board.make_move(move[0], move[1], player)
+    try:
+        score = agent.minimax(board, depth - 1, alpha, float('inf'), False)
+    except SearchTimeout:
+        return None
+    finally:
+        agent._deadline = None
+
+    if slot >= 0:
+        with _shared_alphas.get_lock():
+            if score > _shared_alphas[slot]:
+                _shared_alphas[slot] = score
+
+    return score, alpha, agent.nodes_evaluated, agent.cutoffs, agent.first_move_cutoffs, agent.tt_hits
+
+
+class ParallelSearchPool:
+    """Process pool that searches root moves, with shared alpha bounds per search"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.shared_alphas = multiprocessing.Array('d', MAX_SHARED_SEARCHES)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.shared_alphas,),
+        )
+        self._free_slots: List[int] = list(range(MAX_SHARED_SEARCHES))
+        self._slots_lock = threading.Lock()
+
+    def acquire_slot(self) -> int:
+        with self._slots_lock:
+            if not self._free_slots:
+                return -1
+            slot = self._free_slots.pop()
+        self.shared_alphas[slot] = float('-inf')
+        return slot
+
+    def release_slot(self, slot: int) -> None:
+        if slot >= 0:
+            with self._slots_lock:
+                self._free_slots.append(slot)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ParallelMinimaxAgent(MinimaxAgent):
+    """MinimaxAgent whose root moves are searched across a ParallelSearchPool.
+
+    Fixed-depth and time-budgeted (iterative deepening) searches both work;
+    each iteration fans the root moves out to the pool and merges the
+    results in root-move order, so the chosen move does not depend on
+    which worker finished first.
+    """
+
+    def __init__(self, player: int = 2, depth: int = 4, pool: Optional[ParallelSearchPool] = None, **kwargs):
+        super().__init__(player, depth, **kwargs)
+        self.pool = pool or ParallelSearchPool()
+
+    def _search_root(
+        self,
+        game_state,
+        root_moves: List[Tuple[int, int]],
+        depth: int,
+    ) -> Tuple[Optional[Tuple[int, int]], float]:
+        deadline_wall = None
+        if self._deadline is not None:
+            deadline_wall = time.time() + (self._deadline - time.perf_counter())
+
+        slot = self.pool.acquire_slot()
+        try:
+            futures = [
+                self.pool.executor.submit(
+                    _search_root_move, game_state, move, self.player, depth, slot, deadline_wall
+                )
+                for move in root_moves
+            ]
+            pending = set(futures)
+            while pending:
+                if self._cancelled:
+                    for future in pending:
+                        future.cancel()
+                    raise SearchCancelled()
+                _, pending = wait(pending, timeout=CANCEL_POLL_SECONDS)
+            results = [future.result() for future in futures]
+        finally:
+            self.pool.release_slot(slot)
+
+        if any(result is None for result in results):
+            raise SearchTimeout()
+
+        best_score = float('-inf')
+        best_move: Optional[Tuple[int, int]] = None
+        for move, (score, alpha_used, nodes, cutoffs, first_move_cutoffs, tt_hits) in zip(root_moves, results):
+            self.nodes_evaluated += nodes
+            self.cutoffs += cutoffs
+            self.first_move_cutoffs += first_move_cutoffs
+            self.tt_hits += tt_hits
+            # A score at or below the alpha it was searched with is only an upper bound
+            if score > alpha_used and score > best_score:
+                best_score = score
+                best_move = move
+
+        return best_move, best_score
@@ -0,0 +1,75 @@
+from typing import Dict, Optional
+from collections import Counter
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import time
+
+
+class SamplingProfiler:
+    """Samples one thread's stack while a block runs and keeps the slow runs.
+
+    A background thread reads the target thread's frame every
+    interval_seconds. When the block took at least slow_seconds, the samples
+    are written to output_dir as collapsed stacks ("outer;inner count" per
+    line), the input format of flamegraph.pl and speedscope. Faster runs
+    are discarded.
+    """
+
+    def __init__(
+        self,
+        slow_seconds: float,
+        output_dir: str = "profiles",
+        interval_seconds: float = 0.005,
+        max_files: int = 50,
+    ):
+        self.slow_seconds = slow_seconds
+        self.output_dir = output_dir
+        self.interval_seconds = interval_seconds
+        self.max_files = max_files
+        self.captured = 0
+
+    @contextmanager
+    def profile(self, label: str):
+        """Profile the calling thread for the duration of the with block"""
+        target = threading.get_ident()
+        samples: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample, args=(target, samples, stop), name="profiler", daemon=True
+        )
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.slow_seconds and samples:
+                self._write(label, elapsed, samples)
+
+    def _sample(self, target: int, samples: Counter, stop: threading.Event) -> None:
+        while not stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                samples[";".join(reversed(stack))] += 1
+
+    def _write(self, label: str, elapsed: float, samples: Dict[str, int]) -> Optional[str]:
+        if self.captured >= self.max_files:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{int(elapsed * 1000)}ms.folded"
+        )
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.captured += 1
+        return path
@@ -0,0 +1,180 @@
+from typing import Optional, Tuple, List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import os
+import random
+import time
+
+from game_engine import MetaBoard
+from minimax_agent import MinimaxAgent
+from mcts_agent import MCTSAgent
+
+
+class RandomAgent:
+    """Plays a uniformly random legal move"""
+
+    def __init__(self, player: int, seed: Optional[int] = None):
+        self.player = player
+        self.rng = random.Random(seed)
+
+    def get_best_move(self, game_state) -> Optional[Tuple[int, int]]:
+        boards = game_state.get_available_boards()
+        if not boards:
+            return None
+        board_idx = self.rng.choice(boards)
+        return board_idx, self.rng.choice(game_state.get_available_moves(board_idx))
+
+    def get_search_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+def build_agent(spec: str, player: int, seed: int):
+    """Create an agent from a spec such as "minimax:depth=3" or "mcts:iterations=500"
+
+    minimax accepts depth and time_budget_ms; mcts accepts iterations and
+    time_budget_ms; random takes no options.
+    """
+    name, _, options = spec.partition(":")
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        kwargs[key] = int(value)
+
+    if name == "minimax":
+        return MinimaxAgent(player, kwargs.pop("depth", 3), **kwargs)
+    if name == "mcts":
+        return MCTSAgent(player, seed=seed, **kwargs)
+    if name == "random":
+        return RandomAgent(player, seed)
+    raise ValueError(f"Unknown agent spec: {spec}")
+
+
+def play_game(game_index: int, seed: int, specs: Tuple[str, str], random_plies: int) -> Dict[str, Any]:
+    """Play one game and return its record; the same arguments replay the same game"""
+    rng = random.Random(seed)
+    agents = {
+        1: build_agent(specs[0], 1, rng.getrandbits(32)),
+        2: build_agent(specs[1], 2, rng.getrandbits(32)),
+    }
+    board = MetaBoard()
+    moves: List[List[int]] = []
+    stats: List[Dict[str, Any]] = []
+    player = 1
+    started = time.perf_counter()
+
+    while board.game_winner is None:
+        if len(moves) < random_plies:
+            # Random opening plies so seeded games explore different lines
+            board_idx = rng.choice(board.get_available_boards())
+            move = (board_idx, rng.choice(board.get_available_moves(board_idx)))
+            move_stats: Dict[str, Any] = {"random": True}
+        else:
+            move = agents[player].get_best_move(board)
+            if move is None:
+                break
+            move_stats = agents[player].get_search_stats()
+
+        board.make_move(move[0], move[1], player)
+        moves.append([move[0], move[1], player])
+        stats.append(move_stats)
+        player = 3 - player
+
+    return {
+        "game": game_index,
+        "seed": seed,
+        "players": list(specs),
+        "winner": board.game_winner,
+        "plies": len(moves),
+        "moves": moves,
+        "stats": stats,
+        "duration_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def completed_games(path: str) -> set:
+    """Game indices already recorded in an output file, for resuming.
+
+    A partially written last line from an interrupted run is cut off so
+    new records start on a clean line.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["game"])
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+
+    if valid_bytes < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+def run_self_play(
+    games: int,
+    specs: Tuple[str, str],
+    output: str,
+    workers: int = 1,
+    seed: int = 0,
+    random_plies: int = 2,
+) -> Dict[int, int]:
+    """Play the games missing from output and append one JSON line per game"""
+    done = completed_games(output)
+    pending = [i for i in range(games) if i not in done]
+    # Each game's seed depends only on the run seed and its index
+    seeds = {i: random.Random(seed * 1_000_003 + i).getrandbits(32) for i in pending}
+    outcomes: Dict[int, int] = {}
+
+    with open(output, "a") as out:
+        if workers <= 1:
+            records = (play_game(i, seeds[i], specs, random_plies) for i in pending)
+            for record in records:
+                _write_record(out, record, outcomes)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(play_game, i, seeds[i], specs, random_plies) for i in pending
+                ]
+                for future in as_completed(futures):
+                    _write_record(out, future.result(), outcomes)
+
+    return outcomes
+
+
+def _write_record(out, record: Dict[str, Any], outcomes: Dict[int, int]) -> None:
+    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+    out.flush()
+    winner = record["winner"] or 0
+    outcomes[winner] = outcomes.get(winner, 0) + 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI games and record them as JSON lines")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--player1", default="minimax:depth=3", help="agent spec for X")
+    parser.add_argument("--player2", default="mcts:iterations=1000", help="agent spec for O")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-plies", type=int, default=2, help="random moves before the agents take over")
+    parser.add_argument("--output", default="self_play.jsonl")
+    args = parser.parse_args()
+
+    results = run_self_play(
+        args.games,
+        (args.player1, args.player2),
+        args.output,
+        workers=args.workers,
+        seed=args.seed,
+        random_plies=args.random_plies,
+    )
+    print(f"Played {sum(results.values())} games: "
+          f"X {results.get(1, 0)}, O {results.get(2, 0)}, draw {results.get(3, 0)}")
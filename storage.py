@@ -0,0 +1,347 @@
+from typing import Optional, Dict, Any, List, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import copy
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+from metrics import STORAGE_LATENCY
+
+try:
+    import httpx
+except ImportError:  # Only installed alongside the Supabase client
+    httpx = None
+
+T = TypeVar("T")
+
+logger = logging.getLogger("storage")
+
+# Threads for storage calls made from async handlers, per-attempt timeout,
+# and how many times a failed call is retried with exponential backoff
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS", "8"))
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", "5"))
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", "2"))
+STORAGE_BACKOFF_SECONDS = float(os.getenv("STORAGE_BACKOFF_SECONDS", "0.1"))
+
+# Errors worth retrying: dropped connections, timeouts and a busy SQLite file
+RETRYABLE_ERRORS = (ConnectionError, TimeoutError, OSError, sqlite3.OperationalError) + (
+    (httpx.TransportError,) if httpx is not None else ()
+)
+
+
+class GameStorage:
+    """Persistence interface used by GameStore.
+
+    Rows are plain dicts: games have id, user_id and game_state; moves
+    have game_id, ply, board, position and player. Writes may be retried
+    after they already succeeded, so insert_game and append_moves keep the
+    existing row when its key (id, or game_id and ply) is already stored.
+    """
+
+    def insert_game(self, game_id: str, user_id: str, game_state: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def load_game(self, game_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def update_game_state(self, game_id: str, game_state: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete_game(self, game_id: str) -> None:
+        raise NotImplementedError
+
+    def append_moves(self, game_id: str, moves: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def load_moves(self, game_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete_moves_from(self, game_id: str, ply: int) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SupabaseStorage(GameStorage):
+    def __init__(self, url: str, key: str):
+        from supabase import create_client
+
+        logger.info("Using Supabase storage")
+        self.client = create_client(url, key)
+
+    def insert_game(self, game_id: str, user_id: str, game_state: Dict[str, Any]) -> None:
+        self.client.table("games").upsert({
+            "id": game_id,
+            "user_id": user_id,
+            "game_state": game_state,
+        }, on_conflict="id", ignore_duplicates=True).execute()
+
+    def load_game(self, game_id: str) -> Optional[Dict[str, Any]]:
+        result = self.client.table("games").select("*").eq("id", game_id).execute()
+        return result.data[0] if result.data else None
+
+    def update_game_state(self, game_id: str, game_state: Dict[str, Any]) -> None:
+        self.client.table("games").update({
+            "game_state": game_state,
+        }).eq("id", game_id).execute()
+
+    def delete_game(self, game_id: str) -> None:
+        self.client.table("games").delete().eq("id", game_id).execute()
+
+    def append_moves(self, game_id: str, moves: List[Dict[str, Any]]) -> None:
+        self.client.table("game_moves").upsert(
+            [dict(move, game_id=game_id) for move in moves],
+            on_conflict="game_id,ply",
+            ignore_duplicates=True,
+        ).execute()
+
+    def load_moves(self, game_id: str) -> List[Dict[str, Any]]:
+        return self.client.table("game_moves").select("ply,board,position,player").eq(
+            "game_id", game_id
+        ).order("ply").execute().data
+
+    def delete_moves_from(self, game_id: str, ply: int) -> None:
+        self.client.table("game_moves").delete().eq("game_id", game_id).gte("ply", ply).execute()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    game_state TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_games_user_id ON games(user_id);
+CREATE TABLE IF NOT EXISTS game_moves (
+    game_id TEXT NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+    ply INTEGER NOT NULL,
+    board INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    player INTEGER NOT NULL,
+    PRIMARY KEY (game_id, ply)
+);
+"""
+
+
+class SQLiteStorage(GameStorage):
+    """Local SQLite database in WAL mode with a small pool of shared connections"""
+
+    def __init__(self, path: str = "games.db", pool_size: int = 4):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def insert_game(self, game_id: str, user_id: str, game_state: Dict[str, Any]) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO games (id, user_id, game_state) VALUES (?, ?, ?)",
+                (game_id, user_id, json.dumps(game_state)),
+            )
+
+    def load_game(self, game_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, game_state FROM games WHERE id = ?", (game_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row["id"], "user_id": row["user_id"], "game_state": json.loads(row["game_state"])}
+
+    def update_game_state(self, game_id: str, game_state: Dict[str, Any]) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE games SET game_state = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (json.dumps(game_state), game_id),
+            )
+
+    def delete_game(self, game_id: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
+
+    def append_moves(self, game_id: str, moves: List[Dict[str, Any]]) -> None:
+        with self._connection() as conn:
+            # One transaction, so a failed batch leaves nothing half-written
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO game_moves (game_id, ply, board, position, player)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(game_id, m["ply"], m["board"], m["position"], m["player"]) for m in moves],
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def load_moves(self, game_id: str) -> List[Dict[str, Any]]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT ply, board, position, player FROM game_moves WHERE game_id = ? ORDER BY ply",
+                (game_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_moves_from(self, game_id: str, ply: int) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM game_moves WHERE game_id = ? AND ply >= ?", (game_id, ply))
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class MemoryStorage(GameStorage):
+    """Process-local storage for load tests and benchmarks; nothing survives a restart"""
+
+    def __init__(self):
+        self.games: Dict[str, Dict[str, Any]] = {}
+        self.moves: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def insert_game(self, game_id: str, user_id: str, game_state: Dict[str, Any]) -> None:
+        with self._lock:
+            if game_id in self.games:
+                return
+            self.games[game_id] = {
+                "id": game_id,
+                "user_id": user_id,
+                "game_state": copy.deepcopy(game_state),
+            }
+            self.moves[game_id] = []
+
+    def load_game(self, game_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.games.get(game_id)
+            return copy.deepcopy(row) if row is not None else None
+
+    def update_game_state(self, game_id: str, game_state: Dict[str, Any]) -> None:
+        with self._lock:
+            if game_id in self.games:
+                self.games[game_id]["game_state"] = copy.deepcopy(game_state)
+
+    def delete_game(self, game_id: str) -> None:
+        with self._lock:
+            self.games.pop(game_id, None)
+            self.moves.pop(game_id, None)
+
+    def append_moves(self, game_id: str, moves: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            stored = self.moves.setdefault(game_id, [])
+            plies = {m["ply"] for m in stored}
+            stored.extend(dict(m) for m in moves if m["ply"] not in plies)
+
+    def load_moves(self, game_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(m) for m in self.moves.get(game_id, [])]
+
+    def delete_moves_from(self, game_id: str, ply: int) -> None:
+        with self._lock:
+            self.moves[game_id] = [m for m in self.moves.get(game_id, []) if m["ply"] < ply]
+
+
+class StorageUnavailable(Exception):
+    """Raised when a storage call still fails or times out after all retries"""
+
+
+class AsyncStorageRunner:
+    """Runs blocking storage calls on a bounded thread pool for async handlers.
+
+    Each attempt is limited to timeout_seconds; retryable errors are retried
+    with jittered exponential backoff. A timed-out attempt keeps running in
+    its thread, so calls that are not idempotent are not retried after a
+    timeout.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = STORAGE_THREADS,
+        timeout_seconds: float = STORAGE_TIMEOUT_SECONDS,
+        retries: int = STORAGE_RETRIES,
+        backoff_seconds: float = STORAGE_BACKOFF_SECONDS,
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.retried = 0
+        self.failed = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, idempotent: bool = True) -> T:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args)
+        name = getattr(fn, "__name__", "call")
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, call), self.timeout_seconds
+                )
+                STORAGE_LATENCY.observe(time.perf_counter() - started, name, "ok")
+                return result
+            except asyncio.TimeoutError as e:
+                error: Exception = e
+                retryable = idempotent
+            except RETRYABLE_ERRORS as e:
+                error = e
+                retryable = True
+
+            if not retryable or attempt >= self.retries:
+                self.failed += 1
+                STORAGE_LATENCY.observe(time.perf_counter() - started, name, "error")
+                raise StorageUnavailable(f"{name} failed: {error!r}") from error
+            self.retried += 1
+            await asyncio.sleep(self.backoff_seconds * (2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+def create_storage() -> GameStorage:
+    """Build the backend named by GAME_STORAGE_BACKEND (supabase, sqlite or memory)"""
+    backend = os.getenv("GAME_STORAGE_BACKEND", "supabase")
+
+    if backend == "supabase":
+        supabase_url = os.getenv("SUPABASE_URL")
+        supabase_key = os.getenv("SUPABASE_KEY")
+        if not supabase_url or not supabase_key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in env file")
+        return SupabaseStorage(supabase_url, supabase_key)
+    if backend == "sqlite":
+        return SQLiteStorage(
+            os.getenv("SQLITE_PATH", "games.db"),
+            int(os.getenv("SQLITE_POOL_SIZE", "4")),
+        )
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Unknown GAME_STORAGE_BACKEND: {backend}")
@@ -58,3 +58,32 @@ CREATE TRIGGER update_games_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+
+-- Move log: one row per move, used when GAME_STORAGE_MODE=move_log
+CREATE TABLE IF NOT EXISTS game_moves (
+    game_id UUID REFERENCES games(id) ON DELETE CASCADE NOT NULL,
+    ply INTEGER NOT NULL,
+    board SMALLINT NOT NULL,
+    position SMALLINT NOT NULL,
+    player SMALLINT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (game_id, ply)
+);
+
+-- Enable Row Level Security
+ALTER TABLE game_moves ENABLE ROW LEVEL SECURITY;
+
+-- Policy: Users can see moves of their own games
+CREATE POLICY "Users can view own game moves"
+    ON game_moves FOR SELECT
+    USING (EXISTS (SELECT 1 FROM games WHERE games.id = game_moves.game_id AND games.user_id = auth.uid()));
+
+-- Policy: Users can insert moves into their own games
+CREATE POLICY "Users can insert own game moves"
+    ON game_moves FOR INSERT
+    WITH CHECK (EXISTS (SELECT 1 FROM games WHERE games.id = game_moves.game_id AND games.user_id = auth.uid()));
+
+-- Policy: Users can delete moves of their own games
+CREATE POLICY "Users can delete own game moves"
+    ON game_moves FOR DELETE
+    USING (EXISTS (SELECT 1 FROM games WHERE games.id = game_moves.game_id AND games.user_id = auth.uid()));
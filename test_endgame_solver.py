@@ -0,0 +1,34 @@
+import random
+
+from endgame_solver import EndgameSolver, empty_cells
+from game_engine import MetaBoard
+
+
+def brute_force(board, mover):
+    if board.game_winner is not None:
+        return 1 if board.game_winner == mover else (0 if board.game_winner == 3 else -1)
+    best = -1
+    for board_idx in board.get_available_boards():
+        for position in board.get_available_moves(board_idx):
+            board.make_move(board_idx, position, mover)
+            best = max(best, -brute_force(board, 3 - mover))
+            board.unmake_move()
+    return best
+
+
+def test_shared_results_depend_on_side_to_move():
+    # Solving the same cells for both sides must not reuse the other side's results
+    rng = random.Random(7)
+    solver = EndgameSolver(12)
+    checked = 0
+    while checked < 20:
+        board, player = MetaBoard(), 1
+        while board.game_winner is None and empty_cells(board) > 8:
+            board_idx = rng.choice(board.get_available_boards())
+            board.make_move(board_idx, rng.choice(board.get_available_moves(board_idx)), player)
+            player = 3 - player
+        if board.game_winner is not None:
+            continue
+        for mover in (player, 3 - player):
+            assert solver.solve(board, mover)[1] == brute_force(board, mover)
+        checked += 1
@@ -0,0 +1,13 @@
+import pytest
+
+from game_engine import MetaBoard
+
+
+@pytest.mark.parametrize("move", [(0, 3, 3), (0, 3, 0), (-1, 0, 1), (0, 9, 1)])
+def test_invalid_move_leaves_board_unchanged(move):
+    board = MetaBoard()
+    success, _ = board.make_move(*move)
+
+    assert not success
+    assert board.undo_stack == [] and board.version == 0 and board.hash == 0
+    assert board.make_move(0, 3, 1)[0]
@@ -0,0 +1,133 @@
+import os
+
+# Configure the module-level game store before game_store is imported
+os.environ.setdefault("GAME_STORAGE_BACKEND", "memory")
+os.environ.setdefault("AI_ENDGAME_CELLS", "0")
+
+import pytest
+
+from game_cache import GameCache
+from game_store import GameStore
+from storage import MemoryStorage, SQLiteStorage
+
+FIRST_GAME = [(4, 0), (0, 4), (4, 1), (1, 4), (4, 2)]
+SECOND_GAME = [(4, 4), (4, 8), (8, 4), (4, 3), (3, 4), (4, 5)]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    storage = MemoryStorage() if request.param == "memory" else SQLiteStorage(str(tmp_path / "games.db"))
+    store = GameStore(storage)
+    store.move_log = True
+    store.write_behind = True
+    yield store
+    store.close()
+
+
+def play(store, game_id, moves):
+    game_data = store.get_game(game_id)
+    for i, (board, position) in enumerate(moves):
+        success, message = game_data.board.make_move(board, position, 1 if i % 2 == 0 else 2)
+        assert success, message
+        store.update_game(game_id, game_data)
+    return game_data
+
+
+def reload(store, game_id):
+    store.games.pop(game_id)
+    return store.get_game(game_id)
+
+
+def test_move_log_round_trip(store):
+    game_id = store.create_new_game("user")
+    game_data = play(store, game_id, FIRST_GAME)
+    store.flush_dirty()
+
+    loaded = reload(store, game_id)
+    assert loaded.board.move_history == game_data.board.move_history
+    assert loaded.board.hash == game_data.board.hash
+    assert loaded.user_id == "user"
+
+
+def test_reset_followed_by_longer_game_replaces_moves(store):
+    game_id = store.create_new_game("user")
+    game_data = play(store, game_id, FIRST_GAME)
+    store.flush_dirty()
+
+    # The new game outgrows the old one before the next flush
+    store.reset_game(game_data)
+    store.update_game(game_id, game_data)
+    game_data = play(store, game_id, SECOND_GAME)
+    store.flush_dirty()
+
+    loaded = reload(store, game_id)
+    assert [(m["board"], m["position"]) for m in loaded.board.move_history] == SECOND_GAME
+
+
+def test_replay_rejects_invalid_stored_move(store):
+    game_id = store.create_new_game("user")
+    play(store, game_id, FIRST_GAME[:2])
+    store.flush_dirty()
+
+    # Next move must go to board 4, and cell (0, 4) is already taken
+    store.storage.append_moves(game_id, [{"ply": 2, "board": 0, "position": 4, "player": 1}])
+    store.games.pop(game_id)
+    with pytest.raises(ValueError):
+        store.get_game(game_id)
+
+
+def test_reset_epoch_survives_reload(store):
+    game_id = store.create_new_game("user")
+    game_data = play(store, game_id, FIRST_GAME)
+    store.reset_game(game_data)
+    store.update_game(game_id, game_data)
+    store.flush_dirty()
+
+    assert reload(store, game_id).board.epoch == game_data.board.epoch == 1
+
+
+def test_evicted_dirty_game_waits_for_flush(store):
+    store.games = GameCache(1, None, on_evict=store._on_evict)
+    game_id = store.create_new_game("user")
+    game_data = play(store, game_id, FIRST_GAME)
+
+    # Evicting the unsaved game queues it instead of writing to storage
+    store.create_new_game("other")
+    assert game_id not in store.games
+    assert store.storage.load_moves(game_id) == []
+    assert store.get_game(game_id) is game_data
+
+    store.create_new_game("other")
+    store.flush_dirty()
+    assert len(reload(store, game_id).board.move_history) == len(FIRST_GAME)
+
+
+def test_move_made_during_save_is_left_for_next_save(store):
+    game_id = store.create_new_game("user")
+    game_data = play(store, game_id, FIRST_GAME[:1])
+    append_moves = store.storage.append_moves
+
+    def append_then_move(save_id, moves):
+        append_moves(save_id, moves)
+        if len(game_data.board.move_history) == 1:
+            game_data.board.make_move(*FIRST_GAME[1], 2)
+
+    store.storage.append_moves = append_then_move
+    store.flush_dirty()
+    assert game_data.persisted_ply == 1
+    assert game_data.dirty
+
+    store.update_game(game_id, game_data)
+    store.flush_dirty()
+    assert len(reload(store, game_id).board.move_history) == 2
+
+
+def test_retried_writes_keep_the_stored_rows(store):
+    game_id = store.create_new_game("user")
+    store.storage.insert_game(game_id, "user", {})
+    moves = [{"ply": 0, "board": 4, "position": 0, "player": 1}]
+    store.storage.append_moves(game_id, moves)
+    store.storage.append_moves(game_id, moves)
+
+    assert store.storage.load_moves(game_id) == moves
+    assert store.storage.load_game(game_id)["game_state"] != {}
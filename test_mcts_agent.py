@@ -0,0 +1,8 @@
+from game_engine import MetaBoard
+from mcts_agent import MCTSAgent
+
+
+def test_returns_a_move_with_no_search_budget():
+    for agent in (MCTSAgent(2, time_budget_ms=0, seed=1), MCTSAgent(2, iterations=0, seed=1)):
+        assert agent.get_best_move(MetaBoard()) is not None
+        assert agent.nodes_evaluated == 1
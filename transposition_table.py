@@ -0,0 +1,64 @@
+from typing import Optional, Tuple, List
+
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Slot layout: (key, depth, value, flag, best_move, generation)
+Entry = Tuple[int, int, float, int, Optional[Tuple[int, int]], int]
+
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed by Zobrist hash.
+
+    Each key maps to one slot. A colliding store replaces the slot when it
+    is empty, holds the same position, was written by an earlier search,
+    or was searched to a shallower or equal depth.
+    """
+
+    def __init__(self, size_bits: int = 16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.slots: List[Optional[Entry]] = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self) -> None:
+        """Age existing entries so the next search can overwrite them freely"""
+        self.generation += 1
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key: int) -> Optional[Entry]:
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        value: float,
+        flag: int,
+        best_move: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        index = key & self.mask
+        entry = self.slots[index]
+        if (
+            entry is None
+            or entry[0] == key
+            or entry[5] != self.generation
+            or depth >= entry[1]
+        ):
+            self.slots[index] = (key, depth, value, flag, best_move, self.generation)
+            self.stores += 1
+
+    def clear(self) -> None:
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
@@ -0,0 +1,58 @@
+from typing import Dict, Any, List, Optional
+
+from game_engine import MetaBoard
+
+# Response formats accepted by the game endpoints
+STATE_FORMATS = ("full", "compact", "delta")
+
+
+def compact_state(board: MetaBoard) -> Dict[str, Any]:
+    """Whole position as packed digit strings.
+
+    cells holds the 81 cells board by board (cell board * 9 + position) and
+    meta holds the 9 mini-board results, each as 0 empty, 1 X, 2 O, 3 draw.
+    epoch changes on every reset; clients send it back with delta requests.
+    """
+    position = board.snapshot()
+    return {
+        "cells": position.cells,
+        "meta": position.meta,
+        "next_board": position.next_board,
+        "game_winner": position.game_winner,
+        "ply": position.ply,
+        "epoch": board.epoch,
+    }
+
+
+def state_delta(board: MetaBoard, since_ply: int, epoch: Optional[int] = None) -> Dict[str, Any]:
+    """Moves applied after since_ply as [board, position, player] triples.
+
+    Falls back to compact_state when the client's epoch is missing or stale
+    (the game was reset since) or since_ply is not part of the current
+    history, so the client can resynchronize.
+    """
+    history = board.move_history
+    if epoch != board.epoch or not 0 <= since_ply <= len(history):
+        return compact_state(board)
+
+    moves: List[List[int]] = [
+        [move["board"], move["position"], move["player"]] for move in history[since_ply:]
+    ]
+    return {
+        "since_ply": since_ply,
+        "moves": moves,
+        "next_board": board.next_board,
+        "game_winner": board.game_winner,
+        "ply": len(history),
+        "epoch": board.epoch,
+    }
+
+
+def serialize_state(
+    board: MetaBoard, format: str = "full", since_ply: int = 0, epoch: Optional[int] = None
+) -> Dict[str, Any]:
+    if format == "compact":
+        return compact_state(board)
+    if format == "delta":
+        return state_delta(board, since_ply, epoch)
+    return board.get_state().__dict__